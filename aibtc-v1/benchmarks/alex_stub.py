@@ -0,0 +1,150 @@
+"""Local stand-in for the api.alexgo.io/v1 market data endpoints.
+
+    python aibtc-v1/benchmarks/alex_stub.py --port 8787 --latency 50
+    ALEX_API_URL=http://127.0.0.1:8787/v1 streamlit run aibtc-v1/app.py
+
+Serves /v1/allswaps, /v1/price_history/<token> and /v1/pool_volume/<pool_id>
+with deterministic synthetic data. --latency adds a delay per request and
+--fail-every makes every Nth request return 503 to exercise retries.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LATEST_BLOCK = 170_000
+
+SWAPS = [
+    {
+        "id": index,
+        "quote": "STX",
+        "quoteSymbol": symbol,
+        "quoteId": f"SP102V8P0F7JX67ARQ77WEA3D3CFB5XW39REDT0AM.token-{symbol.lower()}",
+    }
+    for index, symbol in enumerate(["ALEX", "WELSH", "DIKO", "USDA", "ABTC"], 1)
+]
+
+
+def seed_for(name: str) -> float:
+    return int(hashlib.sha256(name.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def price_history(token: str, limit: int) -> dict:
+    seed = seed_for(token)
+    prices = [
+        {
+            "block_height": LATEST_BLOCK - offset,
+            "avg_price_usd": round(
+                1 + seed + 0.1 * math.sin((LATEST_BLOCK - offset) / (20 + 30 * seed)), 6
+            ),
+        }
+        for offset in range(limit)
+    ]
+    return {"token": token, "prices": prices}
+
+
+def pool_volume(pool_id: str, limit: int) -> dict:
+    seed = seed_for(pool_id)
+    volume_values = [
+        {
+            "block_height": LATEST_BLOCK - offset,
+            "volume_24h": round(10_000 * (1 + seed) * (1.5 + math.cos(offset / 7)), 2),
+        }
+        for offset in range(limit)
+    ]
+    return {"token": pool_id, "volume_values": volume_values}
+
+
+class AlexStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, avoid the delayed ack stall
+    disable_nagle_algorithm = True
+    latency = 0.0
+    fail_every = 0
+    counter = itertools.count(1)
+    connections = itertools.count(1)
+
+    def setup(self):
+        super().setup()
+        self.server.connection_count = next(self.connections)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        limit = int(parse_qs(url.query).get("limit", ["100"])[0])
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and next(self.counter) % self.fail_every == 0:
+            return self.send_json({"error": "unavailable"}, 503)
+
+        if parts == ["v1", "allswaps"]:
+            return self.send_json(SWAPS)
+        if len(parts) == 3 and parts[:2] == ["v1", "price_history"]:
+            return self.send_json(price_history(parts[2], limit))
+        if len(parts) == 3 and parts[:2] == ["v1", "pool_volume"]:
+            return self.send_json(pool_volume(parts[2], limit))
+        self.send_json({"error": "not found"}, 404)
+
+    def send_json(self, data, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    port: int = 0, latency_ms: float = 0, fail_every: int = 0
+) -> ThreadingHTTPServer:
+    """Start the stub in a background thread, port 0 picks a free port."""
+    handler = type(
+        "ConfiguredAlexStubHandler",
+        (AlexStubHandler,),
+        {
+            "latency": latency_ms / 1000,
+            "fail_every": fail_every,
+            "counter": itertools.count(1),
+            "connections": itertools.count(1),
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.connection_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0, help="delay in ms")
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.fail_every)
+    print(f"ALEX API stub listening on {stub_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare per-call latency of cold `bun run` spawns against the worker pool.
+
+Run from the repository root so `./agent-tools-ts/` resolves:
+
+    python aibtc-v1/benchmarks/bun_runner.py --calls 20
+    python aibtc-v1/benchmarks/bun_runner.py stacks-bns get-address-by-bns.ts muneeb.btc
+
+With no script given, a throwaway script that only loads `@stacks/transactions`
+is used so the numbers reflect startup and module loading, not the network.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.scripts import BunScriptRunner, BunWorkerPool
+
+BENCH_CONTRACT = ".bench"
+BENCH_SCRIPT = "load-stacks-transactions.ts"
+BENCH_SOURCE = """import { getAddressFromPrivateKey } from "@stacks/transactions";
+console.log(typeof getAddressFromPrivateKey);
+"""
+
+
+def time_calls(run, calls: int):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+        if result is None:
+            raise RuntimeError("Bun worker pool unavailable")
+        if not result["success"]:
+            raise RuntimeError(f"Script failed: {result['error']}")
+    return timings
+
+
+def report(label: str, timings: list):
+    print(
+        f"{label:<12} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+        f"median {statistics.median(timings) * 1000:8.1f} ms   "
+        f"max {max(timings) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("contract_name", nargs="?", default=BENCH_CONTRACT)
+    parser.add_argument("script_name", nargs="?", default=BENCH_SCRIPT)
+    parser.add_argument("arg", nargs="?", default=None)
+    parser.add_argument("--calls", type=int, default=10)
+    args = parser.parse_args()
+
+    bench_dir = None
+    if args.contract_name == BENCH_CONTRACT:
+        bench_dir = os.path.join(
+            BunScriptRunner.working_dir, BunScriptRunner.script_dir, BENCH_CONTRACT
+        )
+        os.makedirs(bench_dir, exist_ok=True)
+        with open(os.path.join(bench_dir, BENCH_SCRIPT), "w") as f:
+            f.write(BENCH_SOURCE)
+
+    script = f"{BunScriptRunner.script_dir}/{args.contract_name}/{args.script_name}"
+    script_args = [args.arg] if args.arg is not None else []
+    pool = BunWorkerPool(BunScriptRunner.working_dir, size=1)
+
+    try:
+        cold = time_calls(
+            lambda: BunScriptRunner.bun_spawn(
+                args.contract_name, args.script_name, args.arg
+            ),
+            args.calls,
+        )
+        # first pool call includes worker startup, report it separately
+        first = time_calls(lambda: pool.run(script, script_args), 1)
+        warm = time_calls(lambda: pool.run(script, script_args), args.calls)
+    finally:
+        pool.close()
+        if bench_dir:
+            shutil.rmtree(bench_dir, ignore_errors=True)
+
+    print(f"{args.calls} calls to {script}")
+    report("cold spawn", cold)
+    report("pool start", first)
+    report("pool warm", warm)
+    print(f"speedup      {statistics.mean(cold) / statistics.mean(warm):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Local stand-in for an OpenAI compatible embeddings endpoint.
+
+    python aibtc-v1/benchmarks/embedding_stub.py --port 8788 --latency 100
+    AIBTC_EMBEDDER_API_BASE=http://127.0.0.1:8788/v1 OPENAI_API_KEY=stub \\
+        OPENAI_EMBEDDER_MODEL=openai/text-embedding-3-small \\
+        python aibtc-v1/run_vector_ingest.py
+
+Serves POST /v1/embeddings with deterministic vectors derived from each
+input text. --latency adds a delay per request and --per-input adds a delay
+per embedded text, like a real endpoint that charges for both.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def embed_text(text: str, dimensions: int) -> list:
+    """Unit vector seeded by the text, so equal texts get equal embeddings."""
+    digest = hashlib.sha256(text.encode()).digest()
+    values = [
+        math.sin(digest[index % len(digest)] * (index + 1))
+        for index in range(dimensions)
+    ]
+    norm = math.sqrt(sum(value * value for value in values)) or 1.0
+    return [value / norm for value in values]
+
+
+class EmbeddingStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, avoid the delayed ack stall
+    disable_nagle_algorithm = True
+    latency = 0.0
+    per_input = 0.0
+    dimensions = 256
+    counter = itertools.count(1)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.rstrip("/") not in ("/v1/embeddings", "/embeddings"):
+            return self.send_json({"error": "not found"}, 404)
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.server.request_count = next(self.counter)
+        time.sleep(self.latency + self.per_input * len(inputs))
+        dimensions = body.get("dimensions") or self.dimensions
+        self.send_json(
+            {
+                "object": "list",
+                "model": body.get("model"),
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": index,
+                        "embedding": embed_text(text, dimensions),
+                    }
+                    for index, text in enumerate(inputs)
+                ],
+                "usage": {
+                    "prompt_tokens": sum(len(text) // 4 for text in inputs),
+                    "total_tokens": sum(len(text) // 4 for text in inputs),
+                },
+            }
+        )
+
+    def send_json(self, data, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    port: int = 0, latency_ms: float = 0, per_input_ms: float = 0, dimensions=256
+) -> ThreadingHTTPServer:
+    """Start the stub in a background thread, port 0 picks a free port."""
+    handler = type(
+        "ConfiguredEmbeddingStubHandler",
+        (EmbeddingStubHandler,),
+        {
+            "latency": latency_ms / 1000,
+            "per_input": per_input_ms / 1000,
+            "dimensions": dimensions,
+            "counter": itertools.count(1),
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--latency", type=float, default=0, help="delay in ms")
+    parser.add_argument(
+        "--per-input", type=float, default=0, help="extra delay in ms per text"
+    )
+    parser.add_argument("--dimensions", type=int, default=256)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.per_input, args.dimensions)
+    print(f"Embedding stub listening on {stub_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
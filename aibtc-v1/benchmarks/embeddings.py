@@ -0,0 +1,103 @@
+"""Compare one embedding request per chunk against batched concurrent requests.
+
+Runs against the local embedding stub, so no network access or api key is
+needed:
+
+    python aibtc-v1/benchmarks/embeddings.py --chunks 300 --latency 100
+
+The chunks are about the size the Clarity book ingestion produces. The
+baseline sends every chunk on its own, the batched run uses the
+AIBTC_EMBED_* settings or the given batch size and concurrency. The last
+two runs go through an empty embedding cache, then the filled one.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from embedding_stub import start_stub_server, stub_url
+from utils.cache import EmbeddingCache
+from utils.vector import AIBTCEmbeddings
+
+WORDS = "define-public define-read-only map-get? map-set ok err uint principal tx-sender asserts! unwrap! let begin".split()
+
+
+def make_chunks(count: int, size: int = 1000) -> list:
+    generator = random.Random(7)
+    chunks = []
+    for _ in range(count):
+        text = ""
+        while len(text) < size:
+            text += generator.choice(WORDS) + " "
+        chunks.append(text[:size])
+    return chunks
+
+
+def run(embedder: AIBTCEmbeddings, server, chunks: list):
+    requests_before = server.request_count
+    start = time.perf_counter()
+    vectors = embedder.embed_documents(chunks)
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(chunks)
+    return elapsed, server.request_count - requests_before, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=100, help="stub delay in ms")
+    parser.add_argument(
+        "--per-input", type=float, default=1, help="stub delay in ms per text"
+    )
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency, per_input_ms=args.per_input)
+    os.environ["AIBTC_EMBEDDER_API_BASE"] = stub_url(server)
+    os.environ["OPENAI_EMBEDDER_MODEL"] = "openai/text-embedding-3-small"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    chunks = make_chunks(args.chunks)
+
+    single = AIBTCEmbeddings(batch_size=1, max_concurrency=1, use_cache=False)
+    elapsed, requests, baseline = run(single, server, chunks)
+    print(
+        f"one per chunk   {elapsed * 1000:8.1f} ms   {requests:4d} requests   "
+        f"{args.chunks / elapsed:7.1f} chunks/s"
+    )
+
+    batched = AIBTCEmbeddings(
+        batch_size=args.batch_size, max_concurrency=args.concurrency, use_cache=False
+    )
+    elapsed, requests, vectors = run(batched, server, chunks)
+    print(
+        f"batched         {elapsed * 1000:8.1f} ms   {requests:4d} requests   "
+        f"{args.chunks / elapsed:7.1f} chunks/s   "
+        f"(batch size {batched.batch_size}, {batched.max_concurrency} concurrent)"
+    )
+    # batches must come back in input order
+    assert vectors == baseline
+
+    # a fresh cache file, filled by the first run and read by the second
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache(os.path.join(directory, "embeddings.db"))
+        cached = AIBTCEmbeddings(
+            batch_size=args.batch_size, max_concurrency=args.concurrency, cache=cache
+        )
+        for label in ("cache cold", "cache warm"):
+            elapsed, requests, _ = run(cached, server, chunks)
+            print(
+                f"{label:<15} {elapsed * 1000:8.1f} ms   {requests:4d} requests   "
+                f"{args.chunks / elapsed:7.1f} chunks/s"
+            )
+        cache.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
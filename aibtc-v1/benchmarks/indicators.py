@@ -0,0 +1,95 @@
+"""Time the trading indicators on a synthetic block-height price series.
+
+    python aibtc-v1/benchmarks/indicators.py --blocks 100000 --repeat 20
+
+The series is a seeded random walk, so runs are comparable across machines.
+A plain Python EMA loop is timed as a reference for the vectorized version.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.indicators import (
+    compute_signals,
+    ema,
+    macd,
+    rolling_std,
+    rsi,
+    sma,
+    support_resistance,
+)
+
+
+def synthetic_series(blocks: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    block_heights = np.arange(150_000, 150_000 + blocks)
+    prices = np.abs(1.0 + np.cumsum(rng.normal(0, 0.002, blocks))) + 0.01
+    volumes = rng.lognormal(10, 1, blocks)
+    return block_heights, prices, volumes
+
+
+def ema_loop(values, period: int):
+    alpha = 2.0 / (period + 1)
+    result = [values[0]]
+    for value in values[1:]:
+        result.append(alpha * value + (1 - alpha) * result[-1])
+    return result
+
+
+def time_call(run, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list):
+    print(
+        f"{label:<20} mean {statistics.mean(timings) * 1000:8.2f} ms   "
+        f"median {statistics.median(timings) * 1000:8.2f} ms   "
+        f"min {min(timings) * 1000:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    block_heights, prices, volumes = synthetic_series(args.blocks)
+    price_list = prices.tolist()
+    print(f"{args.blocks} blocks, {args.repeat} runs each\n")
+
+    report("sma 50", time_call(lambda: sma(prices, 50), args.repeat))
+    report("sma 100", time_call(lambda: sma(prices, 100), args.repeat))
+    report("rolling std 100", time_call(lambda: rolling_std(prices, 100), args.repeat))
+    report("ema 26", time_call(lambda: ema(prices, 26), args.repeat))
+    report("ema 26 (loop)", time_call(lambda: ema_loop(price_list, 26), args.repeat))
+    report("rsi 14", time_call(lambda: rsi(prices, 14), args.repeat))
+    report("macd 12/26/9", time_call(lambda: macd(prices), args.repeat))
+    report(
+        "support/resistance",
+        time_call(
+            lambda: support_resistance(prices, lookback=args.blocks), args.repeat
+        ),
+    )
+    report(
+        "compute_signals",
+        time_call(
+            lambda: compute_signals(block_heights, prices, block_heights, volumes),
+            args.repeat,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
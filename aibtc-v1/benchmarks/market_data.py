@@ -0,0 +1,72 @@
+"""Compare bare requests.get calls against the pooled market data client.
+
+Runs against the local ALEX API stub, so no network access is needed:
+
+    python aibtc-v1/benchmarks/market_data.py --tokens 20 --latency 30
+
+Each token needs a price history and a pool volume request. The baseline
+fetches them one after the other with a new connection per request, the
+client reuses kept-alive connections and fetches both at once.
+"""
+
+import argparse
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from alex_stub import SWAPS, start_stub_server, stub_url
+from utils.market_data import MarketDataClient
+
+
+def fetch_bare(base_url: str, token_address: str, pool_id: int):
+    for path in (f"price_history/{token_address}", f"pool_volume/{pool_id}"):
+        response = requests.get(f"{base_url}/{path}?limit=250")
+        response.raise_for_status()
+        response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=30, help="stub delay in ms")
+    parser.add_argument(
+        "--fail-every", type=int, default=0, help="stub returns 503 every Nth request"
+    )
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency, fail_every=args.fail_every)
+    base_url = stub_url(server)
+    swaps = [SWAPS[index % len(SWAPS)] for index in range(args.tokens)]
+
+    if not args.fail_every:
+        connections = server.connection_count
+        start = time.perf_counter()
+        for swap in swaps:
+            fetch_bare(base_url, swap["quoteId"], swap["id"])
+        elapsed = time.perf_counter() - start
+        print(
+            f"bare requests   {elapsed * 1000:8.1f} ms total   "
+            f"{elapsed / args.tokens * 1000:6.1f} ms/token   "
+            f"{server.connection_count - connections} connections"
+        )
+
+    client = MarketDataClient(base_url=base_url, backoff_factor=0.05)
+    connections = server.connection_count
+    start = time.perf_counter()
+    for swap in swaps:
+        client.get_price_and_volume(swap["quoteId"], swap["id"], 250)
+    elapsed = time.perf_counter() - start
+    print(
+        f"pooled client   {elapsed * 1000:8.1f} ms total   "
+        f"{elapsed / args.tokens * 1000:6.1f} ms/token   "
+        f"{server.connection_count - connections} connections"
+    )
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Compare the numpy vector index with a chroma collection on synthetic embeddings.
+
+    python aibtc-v1/benchmarks/vector_index.py --chunks 2000 --queries 200
+
+Reports the time to import the search tools module for each backend in a
+fresh interpreter, with the heavy modules it loads, and the
+per-query latency of exact search, IVF search and chroma, with the recall
+of the approximate searches against exact top k. Chroma is skipped when it
+is not installed.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.vector_index import VectorIndex
+
+try:
+    import chromadb
+except ImportError:
+    chromadb = None
+
+# the module behind the search tools, as loaded for the numpy backend and once
+# the chroma backend opens its client, then the two engines on their own
+IMPORTS = {
+    "utils.vector": "import utils.vector",
+    "utils.vector + chroma": "import utils.vector as v; v.get_chroma_client()",
+    "numpy index": "import utils.vector_index",
+    "chromadb": "import chromadb",
+}
+
+HEAVY_MODULES = ["chromadb", "langchain"]
+
+
+def import_time(statement: str, repeat: int = 3):
+    """Best wall time of a fresh interpreter running the import with the heavy modules it loaded, or None."""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    report = "; import sys; print(' '.join(m for m in %r if m in sys.modules))"
+    best = None
+    with tempfile.TemporaryDirectory() as directory:
+        env = {**os.environ, "AIBTC_VECTOR_STORE_PATH": directory}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-c", statement + report % HEAVY_MODULES],
+                cwd=root,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                return None
+            best = elapsed if best is None else min(best, elapsed)
+    return best, result.stdout.strip()
+
+
+def make_corpus(chunks: int, dimensions: int, topics: int, seed: int = 7):
+    """Embeddings clustered around topics, roughly like chunks of a book."""
+    generator = np.random.default_rng(seed)
+    centers = generator.normal(size=(topics, dimensions))
+    labels = generator.integers(0, topics, chunks)
+    vectors = centers[labels] + 0.8 * generator.normal(size=(chunks, dimensions))
+    return vectors.astype(np.float32), labels
+
+
+def time_queries(search, queries) -> tuple:
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(search(query))
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def recall(results, exact) -> float:
+    hits = sum(len(set(found) & set(truth)) for found, truth in zip(results, exact))
+    return hits / sum(len(truth) for truth in exact)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nlist", type=int, default=32)
+    parser.add_argument("--nprobe", type=int, default=4)
+    args = parser.parse_args()
+
+    for label, statement in IMPORTS.items():
+        timing = import_time(statement)
+        if timing is None:
+            print(f"import {label:<22} not installed")
+        else:
+            elapsed, loaded = timing
+            print(
+                f"import {label:<22} {elapsed * 1000:8.1f} ms   "
+                f"loads {loaded or 'no chromadb or langchain'}"
+            )
+
+    vectors, labels = make_corpus(args.chunks, args.dimensions, topics=40)
+    generator = np.random.default_rng(11)
+    queries = vectors[generator.integers(0, args.chunks, args.queries)]
+    queries = queries + 0.5 * generator.normal(size=queries.shape).astype(np.float32)
+    ids = [f"chunk-{row}" for row in range(args.chunks)]
+    documents = [f"document {row}" for row in range(args.chunks)]
+    metadatas = [{"source": f"topic-{label}"} for label in labels]
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        exact_index = VectorIndex.build(
+            os.path.join(directory, "exact"), ids, documents, metadatas, vectors
+        )
+        print(f"build exact index      {(time.perf_counter() - start) * 1000:8.1f} ms")
+        start = time.perf_counter()
+        ivf_index = VectorIndex.build(
+            os.path.join(directory, "ivf"),
+            ids,
+            documents,
+            metadatas,
+            vectors,
+            nlist=args.nlist,
+        )
+        print(f"build ivf index        {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        latency, exact = time_queries(
+            lambda query: [
+                result["id"] for result in exact_index.search(query, k=args.k)
+            ],
+            queries,
+        )
+        print(f"numpy exact            {latency * 1000:8.3f} ms/query")
+        latency, results = time_queries(
+            lambda query: [
+                result["id"]
+                for result in ivf_index.search(query, k=args.k, nprobe=args.nprobe)
+            ],
+            queries,
+        )
+        print(
+            f"numpy ivf nprobe {args.nprobe:<5} {latency * 1000:8.3f} ms/query   "
+            f"recall {recall(results, exact):.3f}"
+        )
+
+        if chromadb is None:
+            print("chroma                 not installed")
+            return
+        client = chromadb.PersistentClient(path=os.path.join(directory, "chroma"))
+        collection = client.create_collection(
+            "benchmark", metadata={"hnsw:space": "cosine"}
+        )
+        start = time.perf_counter()
+        for offset in range(0, args.chunks, 1000):
+            collection.add(
+                ids=ids[offset : offset + 1000],
+                documents=documents[offset : offset + 1000],
+                metadatas=metadatas[offset : offset + 1000],
+                embeddings=vectors[offset : offset + 1000].tolist(),
+            )
+        print(f"build chroma           {(time.perf_counter() - start) * 1000:8.1f} ms")
+        latency, results = time_queries(
+            lambda query: collection.query(
+                query_embeddings=[query.tolist()], n_results=args.k
+            )["ids"][0],
+            queries,
+        )
+        print(
+            f"chroma                 {latency * 1000:8.3f} ms/query   "
+            f"recall {recall(results, exact):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
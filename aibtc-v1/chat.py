@@ -242,10 +242,10 @@ def run_crew_ai(crew_name: str, parameters: str) -> str:
     crew_instance = crew_class(st.session_state.embedder)
     crew_instance.setup_agents(st.session_state.llm)
     crew_instance.setup_tasks(parameters)
-    crew = crew_instance.create_crew()
 
+    # crews choose how they run, e.g. the contract analyzer runs in parallel
     with st.spinner(f"Running {crew_name} CrewAI..."):
-        result = crew.kickoff()
+        result = crew_instance.kickoff()
 
     st.success(f"Execution complete for {crew_name}!")
     st.subheader("Analysis Results")
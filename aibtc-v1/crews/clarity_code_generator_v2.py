@@ -5,7 +5,7 @@ from crewai import Agent, Task
 from crewai_tools import tool, Tool
 from textwrap import dedent
 from utils.clarinet import ClarinetInterface
-from utils.clarity import clarityFunctionsList, clarityHints, clarityKeywordsList
+from utils.clarity_reference import format_clarity_hints, format_clarity_reference
 from utils.crews import AIBTC_Crew, display_token_usage
 from utils.scripts import get_timestamp
 
@@ -57,11 +57,14 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
                 "You are an expert in Clarity, a smart contract language for the Stacks blockchain. "
                 "Your goal is to write secure, efficient, and functional Clarity code based on specific user requirements. "
                 "You should tailor your code generation to meet the exact needs described in the user input. "
-                f"Remember to follow the Clarity hints for best practices:\n{clarityHints}"
-                f"{clarityKeywordsList}"
-                f"{clarityFunctionsList}"
+                "Only use the Clarity keywords and functions given in your task or found with your reference tool. "
+                "Remember to follow the Clarity hints for best practices given in your task."
             ),
-            tools=[AgentTools.add_new_smart_contract, AgentTools.update_smart_contract],
+            tools=[
+                AgentTools.add_new_smart_contract,
+                AgentTools.update_smart_contract,
+                AgentTools.look_up_clarity_reference,
+            ],
             allow_delegation=False,
             memory=True,
             verbose=True,
@@ -77,10 +80,11 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
                 "Your goal is to analyze the generated code by checking the syntax, providing detailed feedback on any issues found. "
                 "If you encounter issues, provide detailed context and ask the Clarity Code Generator to update the contract. "
                 "Do not continue until the code passes the syntax check. "
-                f"Remember to follow the Clarity hints for best practices:\n{clarityHints}"
+                "Remember to follow the Clarity hints for best practices given in your task."
             ),
             tools=[
                 AgentTools.check_all_smart_contract_syntax,
+                AgentTools.look_up_clarity_reference,
             ],
             allow_delegation=True,
             memory=True,
@@ -96,7 +100,6 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
                 "You are a skilled Clarity code reporter, responsible for creating detailed reports on the quality and syntax of Clarity code. "
                 "Your goal is to provide a comprehensive analysis of the code review results, highlighting any issues found and suggesting improvements."
                 "You ensure that the output clearly presents both the code and its review in a user-friendly Markdown format."
-                f"Remember to follow the Clarity hints for best practices:\n{clarityHints}"
             ),
             tools=[],
             allow_delegation=False,
@@ -107,6 +110,11 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
         self.add_agent(clarity_code_reporter)
 
     def setup_tasks(self, user_input):
+        # only the keywords, functions and hints relevant to the requirements,
+        # the reference tool has the examples and anything else
+        clarity_reference = format_clarity_reference(user_input, brief=True)
+        clarity_hints = format_clarity_hints(user_input)
+
         setup_clarinet_environment = Task(
             description="Initialize the Clarinet environment to ensure all tools and dependencies are correctly set up.",
             expected_output="A confirmation that the Clarinet environment has been successfully initialized.",
@@ -125,7 +133,8 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
             description=(
                 f"Generate a Clarity code snippet for a smart contract on the Stacks blockchain based on the following user requirements: {user_input}. "
                 "Ensure the code is secure, efficient, and properly handles exceptions. "
-                "Store the generated code using your tools to create a new smart contract."
+                "Store the generated code using your tools to create a new smart contract.\n\n"
+                f"{clarity_reference}\n\n{clarity_hints}"
             ),
             expected_output="The generated Clarity code snippet for the smart contract, saved in the Clarinet project.",
             agent=self.agents[2],  # clarity_code_generator
@@ -142,7 +151,8 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
                 "Review the generated Clarity code by checking its syntax using your tools. "
                 "Provide a detailed report on the code quality, syntax check results, and any issues found. "
                 f"Consider how well the code meets the original user requirements: {user_input}. "
-                "Delegate to the Clarity Code Generator until the code passes the syntax check."
+                "Delegate to the Clarity Code Generator until the code passes the syntax check.\n\n"
+                f"{clarity_hints}"
             ),
             expected_output="Once the syntax check passes, a detailed report on the code quality, syntax check results, and any issues found.",
             agent=self.agents[3],  # clarity_code_reviewer
@@ -201,7 +211,9 @@ class ClarityCodeGeneratorCrewV2(AIBTC_Crew):
 
                 # create and run the crew
                 print("Creating Clarity Code Generator V2 Crew...")
-                clarity_code_generator_crew_class = ClarityCodeGeneratorCrewV2()
+                clarity_code_generator_crew_class = ClarityCodeGeneratorCrewV2(
+                    st.session_state.embedder
+                )
                 clarity_code_generator_crew_class.setup_agents(llm)
                 clarity_code_generator_crew_class.setup_tasks(user_input)
                 clarity_code_generator_crew = (
@@ -359,6 +371,15 @@ class AgentTools:
             return f"Error adding mainnet contract as requirement: {result['stderr']}"
         return f"Successfully added mainnet contract '{contract_id}' as requirement.\n{result['stdout']}"
 
+    @staticmethod
+    @tool("Look Up Clarity Reference")
+    def look_up_clarity_reference(query: str) -> str:
+        """Look up Clarity keywords and functions by name or by what they do, e.g. `map-set` or "transfer fungible tokens"."""
+        try:
+            return format_clarity_reference(query, top_n=5)
+        except Exception as e:
+            return f"Error looking up Clarity reference: {str(e)}"
+
     @classmethod
     def get_all_tools(cls):
         members = inspect.getmembers(cls)
@@ -2,10 +2,22 @@ import inspect
 import streamlit as st
 from crewai import Agent, Task
 from crewai_tools import tool, Tool
-from textwrap import dedent
+from crewai.crews.crew_output import CrewOutput
+from textwrap import dedent, indent
 from utils.clarity import clarityHints
+from utils.clarity_parser import (
+    ASSET_WRITES,
+    ClarityParseError,
+    extract_functions,
+    format_function_inventory,
+    format_function_list,
+    function_fingerprints,
+    slice_contract_or_full,
+)
+from utils.audits import AuditStore, extract_mentions, mentions, parse_function_list
+from utils.contracts import fetch_contract_source, is_contract_identifier
 from utils.crews import AIBTC_Crew, display_token_usage
-from utils.scripts import BunScriptRunner, get_timestamp
+from utils.scripts import get_timestamp
 
 
 taskListFormat = """
@@ -96,6 +108,15 @@ analysisFormat = """
 {{additional comments}}
 """
 
+# category -> (listing task, analysis task), used to store per-function findings
+CATEGORY_TASKS = {
+    "RED": ("Red Functions", "Analyze Red Functions"),
+    "ORANGE": ("Orange Functions", "Analyze Orange Functions"),
+    "YELLOW": ("Yellow Functions", "Analyze Yellow Functions"),
+    "GREEN": ("Green Functions", "Analyze Green Functions"),
+    "MISSING": ("Missing Functions", "Analyze Missing Functions"),
+}
+
 reviewFormat = """
 ## General Code Review
 
@@ -128,6 +149,13 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
             "This crew analyzes smart contracts on the Stacks blockchain and provides insights and recommendations.",
             embedder,
         )
+        self.contract_identifier = None
+        self.contract_source = None
+        self.contract_functions = None
+        self.sliced_tasks = set()
+        self.fingerprints = {}
+        self.prior_audit = None
+        self.reused_functions = []
 
     def setup_agents(self, llm):
         # contract retrieval agent
@@ -183,8 +211,52 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
         )
         self.add_agent(contract_report_writer)
 
-    def setup_tasks(self, contract_identifier):
-        # TODO: add names to all tasks!
+    def setup_tasks(
+        self, contract_identifier, previous_identifier=None, reuse_prior=True
+    ):
+        self.contract_identifier = contract_identifier.strip()
+        # parse the contract up front so function lists and code come from the
+        # parser instead of LLM tasks, falls back to LLM tasks if it can't be parsed
+        self.contract_source = get_contract_source(contract_identifier)
+        self.contract_functions = parse_contract_functions(self.contract_source)
+        if self.contract_functions is None:
+            self.contract_source = None
+        self.sliced_tasks = set()
+        functions = self.contract_functions
+
+        # functions unchanged since a stored audit reuse its findings, so only
+        # the rest go through categorization and analysis. reuse_prior=False
+        # audits everything again, e.g. after a prompt or model change
+        self.fingerprints = {}
+        self.prior_audit = None
+        self.reused_functions = []
+        if functions is not None:
+            self.fingerprints = function_fingerprints(self.contract_source)
+            if reuse_prior:
+                self.prior_audit = AuditStore().get(
+                    (previous_identifier or contract_identifier).strip()
+                )
+            self.reused_functions = self.find_reused_functions()
+            analyzed = [f for f in functions if f.name not in self.reused_functions]
+        else:
+            analyzed = None
+
+        if analyzed is not None:
+            inventory = dedent(
+                f"""
+                Functions found by the static parser (the suggested category is a mechanical hint, not a final decision):
+                {format_function_inventory(analyzed)}
+                """
+            )
+        else:
+            inventory = ""
+        full_code = self.format_code()
+        if self.reused_functions:
+            category_code = self.format_code([f.name for f in analyzed])
+        else:
+            category_code = full_code
+        # skip categorization and analysis when every function was reused
+        analyze_categories = analyzed is None or bool(analyzed)
 
         #
         # STAGE 1: PREP THE INFORMATION
@@ -192,16 +264,23 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
 
         # get the contract code
         get_contract_code = Task(
+            name="Get Contract Code",
             description=f"Retrieve the contract code for analysis. User Input: {contract_identifier}",
             expected_output="The contract code for analysis in raw format with no modifications or additional output.",
             agent=self.agents[0],  # contract retrieval agent
             context=[],
         )
-        self.add_task(get_contract_code)
+        # the retrieval task is only needed when the source isn't known yet
+        if functions is None:
+            self.add_task(get_contract_code)
+            code_context = [get_contract_code]
+        else:
+            code_context = []
 
         # what is the general purpose of the contract
         general_concept = Task(
-            description="Given the contract code, what is the general concept of the contract?",
+            name="General Concept",
+            description=f"Given the contract code, what is the general concept of the contract?{full_code}",
             expected_output=dedent(
                 f"""
                 A summary of the contract's purpose and functionality.
@@ -210,12 +289,20 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
         self.add_task(general_concept)
 
         # create list of functions that use traits
+        if analyzed is not None:
+            parsed_trait_functions = [f for f in analyzed if f.trait_args]
+            trait_function_hint = "Functions that take traits as arguments:\n"
+            trait_function_hint += format_function_list(parsed_trait_functions)
+        else:
+            parsed_trait_functions = None
+            trait_function_hint = ""
         trait_functions = Task(
+            name="Trait Functions",
             description="Help identify and categorize functions that take traits as arguments.",
             expected_output=(
                 f"""
@@ -225,12 +312,25 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(trait_functions)
+        if functions is None:
+            self.add_task(trait_functions)
 
         # check for functions that use as-contract
+        if analyzed is not None:
+            parsed_as_contract_functions = [f for f in analyzed if f.as_contract_calls]
+            as_contract_function_hint = (
+                "Functions that use `as-contract` with `contract-call?`:\n"
+            )
+            as_contract_function_hint += format_function_list(
+                parsed_as_contract_functions
+            )
+        else:
+            parsed_as_contract_functions = None
+            as_contract_function_hint = ""
         as_contract_functions = Task(
+            name="As Contract Functions",
             description="Help identify and categorize functions that use `as-contract` with `contract-call?`.",
             expected_output=dedent(
                 f"""
@@ -240,16 +340,20 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(as_contract_functions)
+        if functions is None:
+            self.add_task(as_contract_functions)
 
         # check for green functions
         green_functions = Task(
+            name="Green Functions",
             description=dedent(
                 f"""
                 Help identify and categorize functions that would be considered GREEN in terms of risk.
                 GREEN - harmless, do not participate in anything super important, in most cases it will be just a read-only function that returns value stored on-chain.
+                {inventory}
+                {category_code}
                 """
             ),
             expected_output=dedent(
@@ -260,16 +364,20 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(green_functions)
+        if analyze_categories:
+            self.add_task(green_functions)
 
         # check for yellow functions
         yellow_functions = Task(
+            name="Yellow Functions",
             description=dedent(
                 f"""
                 Help identify and categorize functions that would be considered YELLOW in terms of risk.
                 YELLOW - can change value of variable of map entry, but they are not used to anything critical. In most cases it will functions that can modify meta-data stored on chain.
+                {inventory}
+                {category_code}
                 """
             ),
             expected_output=dedent(
@@ -280,16 +388,20 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(yellow_functions)
+        if analyze_categories:
+            self.add_task(yellow_functions)
 
         # check for orange functions
         orange_functions = Task(
+            name="Orange Functions",
             description=dedent(
                 f"""
                 Help identify and categorize functions that would be considered ORANGE in terms of risk.
                 ORANGE - functions without side-effects used by functions with side-effects and functions with side-effects that can alter contract behavior but not in a way that can lead to theft, funds loss or contract lock.
+                {inventory}
+                {category_code}
                 """
             ),
             expected_output=dedent(
@@ -300,16 +412,20 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(orange_functions)
+        if analyze_categories:
+            self.add_task(orange_functions)
 
         # check for red functions
         red_functions = Task(
+            name="Red Functions",
             description=dedent(
                 f"""
                 Help identify and categorize functions that would be considered RED in terms of risk.
                 RED - functions that can lead to theft, funds loss or contract lock.
+                {inventory}
+                {category_code}
                 """
             ),
             expected_output=dedent(
@@ -320,16 +436,19 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
-        self.add_task(red_functions)
+        if analyze_categories:
+            self.add_task(red_functions)
 
         # check for missing functions
         missing_functions = Task(
+            name="Missing Functions",
             description=dedent(
-                """
+                f"""
                 Help identify and categorize functions that are missing from the provided lists.
                 Only include a function if it is missing from all categories.
+                {inventory}
                 """
             ),
             expected_output=dedent(
@@ -340,26 +459,31 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
+            # the parsed inventory replaces the full contract when available
             context=[
-                get_contract_code,
+                *code_context,
                 green_functions,
                 yellow_functions,
                 orange_functions,
                 red_functions,
             ],
         )
-        self.add_task(missing_functions)
+        if analyze_categories:
+            self.add_task(missing_functions)
 
         #
         # STAGE 2 - ANALYZE THE CATEGORIES
         #
 
         analyze_trait_functions = Task(
+            name="Analyze Trait Functions",
             description=dedent(
                 f"""
                 Analyze the functions that take traits as arguments for correctness and consider the following:
                 - Traits should be used correctly and consistently throughout the contract.
                 - Functions should to be written with the assumption that the supplied contract is malicious and cannot be trusted at any point in time
+                {trait_function_hint}
+                {self.format_code([f.name for f in parsed_trait_functions or []])}
                 """
             ),
             expected_output=dedent(
@@ -372,16 +496,21 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, trait_functions],
+            context=code_context + ([trait_functions] if functions is None else []),
         )
-        self.add_task(analyze_trait_functions)
+        # skip the analysis when the parser found no trait functions
+        if parsed_trait_functions is None or parsed_trait_functions:
+            self.add_task(analyze_trait_functions)
 
         analyze_as_contract_functions = Task(
+            name="Analyze As Contract Functions",
             description=dedent(
                 f"""
                 Analyze the functions that use `as-contract` with `contract-call?` for correctness and consider the following:
                 - `as-contract` function is used to switch calling context from user to contract.
                 - The use of `as-contract` should be appropriate and secure.
+                {as_contract_function_hint}
+                {self.format_code([f.name for f in parsed_as_contract_functions or []])}
                 """
             ),
             expected_output=dedent(
@@ -394,11 +523,15 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, as_contract_functions],
+            context=code_context
+            + ([as_contract_functions] if functions is None else []),
         )
-        self.add_task(analyze_as_contract_functions)
+        # skip the analysis when the parser found no as-contract calls
+        if parsed_as_contract_functions is None or parsed_as_contract_functions:
+            self.add_task(analyze_as_contract_functions)
 
         analyze_green_functions = Task(
+            name="Analyze Green Functions",
             description=dedent(
                 f"""
                 Analyze the GREEN functions for correctness and consider the following:
@@ -415,11 +548,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, green_functions],
+            context=code_context + [green_functions],
         )
-        self.add_task(analyze_green_functions)
+        self.sliced_tasks.add(id(analyze_green_functions))
+        if analyze_categories:
+            self.add_task(analyze_green_functions)
 
         analyze_yellow_functions = Task(
+            name="Analyze Yellow Functions",
             description=dedent(
                 f"""
                 Analyze the YELLOW functions for proper authorization and access control and consider the following:
@@ -437,11 +573,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, yellow_functions],
+            context=code_context + [yellow_functions],
         )
-        self.add_task(analyze_yellow_functions)
+        self.sliced_tasks.add(id(analyze_yellow_functions))
+        if analyze_categories:
+            self.add_task(analyze_yellow_functions)
 
         analyze_orange_functions = Task(
+            name="Analyze Orange Functions",
             description=dedent(
                 f"""
                 Analyze the ORANGE functions for proper authorization, access control, and security vulnerabilities and consider the following:
@@ -459,11 +598,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, orange_functions],
+            context=code_context + [orange_functions],
         )
-        self.add_task(analyze_orange_functions)
+        self.sliced_tasks.add(id(analyze_orange_functions))
+        if analyze_categories:
+            self.add_task(analyze_orange_functions)
 
         analyze_red_functions = Task(
+            name="Analyze Red Functions",
             description=dedent(
                 f"""
                 Analyze the provided functions as RED functions for critical security issues and consider the following:
@@ -481,14 +623,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[
-                get_contract_code,
-                red_functions,
-            ],
+            context=code_context + [red_functions],
         )
-        self.add_task(analyze_red_functions)
+        self.sliced_tasks.add(id(analyze_red_functions))
+        if analyze_categories:
+            self.add_task(analyze_red_functions)
 
         analyze_missing_functions = Task(
+            name="Analyze Missing Functions",
             description=dedent(
                 f"""
                 Analyze the missing functions for potential risks and consider the following:
@@ -504,23 +646,24 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[
-                get_contract_code,
-                missing_functions,
-            ],
+            context=code_context + [missing_functions],
         )
-        self.add_task(analyze_missing_functions)
+        self.sliced_tasks.add(id(analyze_missing_functions))
+        if analyze_categories:
+            self.add_task(analyze_missing_functions)
 
         #
         # STAGE 3 - ANALYZE COMMON ISSUES
         #
 
         review_complex_logic = Task(
+            name="Review Complex Logic",
             description=dedent(
                 f"""
                 Review the complex logic identified in the previous stages for potential flaws and consider the following:
                 - Complex logic should be broken down into smaller, more manageable parts.
                 - Edge cases and potential vulnerabilities should be identified and addressed.
+                {full_code}
                 """
             ),
             expected_output=dedent(
@@ -532,16 +675,18 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
         self.add_task(review_complex_logic)
 
         review_fee_validation = Task(
+            name="Review Fee Validation",
             description=dedent(
                 f"""
                 Review the validation of fees and token transfers for potential issues and consider the following:
                 - Fees and token transfers should be validated to prevent zero or unintended values.
                 - Edge cases and potential vulnerabilities should be identified and addressed.
+                {self.format_code([f.name for f in functions or [] if set(f.writes) & ASSET_WRITES])}
                 """
             ),
             expected_output=dedent(
@@ -553,16 +698,18 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
         self.add_task(review_fee_validation)
 
         review_input_validation = Task(
+            name="Review Input Validation",
             description=dedent(
                 f"""
                 Review the validation of user-provided inputs for potential vulnerabilities and consider the following:
                 - User inputs should be properly validated to prevent vulnerabilities.
                 - Edge cases and potential vulnerabilities should be identified and addressed.
+                {self.format_code([f.name for f in functions or [] if f.kind == "public"])}
                 """
             ),
             expected_output=dedent(
@@ -574,16 +721,18 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
         self.add_task(review_input_validation)
 
         review_pause_resume = Task(
+            name="Review Pause Resume",
             description=dedent(
                 f"""
                 Review the mechanisms for pausing and resuming contract operations for potential issues and consider the following:
                 - Pause functionality should include a way to resume to prevent permanent contract lockout.
                 - Edge cases and potential vulnerabilities should be identified and addressed.
+                {full_code}
                 """
             ),
             expected_output=dedent(
@@ -595,16 +744,18 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code],
+            context=code_context,
         )
         self.add_task(review_pause_resume)
 
         review_edge_cases = Task(
+            name="Review Edge Cases",
             description=dedent(
                 f"""
                 Review the contract for potential edge cases and consider the following:
                 - Edge cases should be identified and tested to ensure the contract behaves as expected.
                 - Potential vulnerabilities should be identified and addressed.
+                {full_code}
                 """
             ),
             expected_output=dedent(
@@ -616,7 +767,7 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[1],  # contract analysis agent
-            context=[get_contract_code, review_complex_logic],
+            context=code_context + [review_complex_logic],
         )
         self.add_task(review_edge_cases)
 
@@ -625,9 +776,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
         #
 
         # compile color analysis info
-        # TODO: can split and make async for each section
         compile_analysis = Task(
-            description="Compile the findings from the color analysis into a comprehensive audit report.",
+            name="Compile Analysis",
+            description=dedent(
+                f"""
+                Compile the findings from the color analysis into a comprehensive audit report.
+                {self.format_reused_findings()}
+                """
+            ),
             expected_output=dedent(
                 f"""
                 A detailed audit report summarizing the findings from the color analysis.
@@ -636,24 +792,27 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 """
             ),
             agent=self.agents[2],  # contract report writer
-            context=[
-                general_concept,
-                green_functions,
-                analyze_green_functions,
-                yellow_functions,
-                analyze_yellow_functions,
-                orange_functions,
-                analyze_orange_functions,
-                red_functions,
-                analyze_red_functions,
-                missing_functions,
-                analyze_missing_functions,
-            ],
+            context=self.added_tasks(
+                [
+                    general_concept,
+                    green_functions,
+                    analyze_green_functions,
+                    yellow_functions,
+                    analyze_yellow_functions,
+                    orange_functions,
+                    analyze_orange_functions,
+                    red_functions,
+                    analyze_red_functions,
+                    missing_functions,
+                    analyze_missing_functions,
+                ]
+            ),
         )
         self.add_task(compile_analysis)
 
         # compile review information
         compile_review = Task(
+            name="Compile Review",
             description="Compile the findings from the contract review into a comprehensive audit report.",
             expected_output=dedent(
                 f"""
@@ -675,7 +834,13 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
 
         # final report
         final_report = Task(
-            description="Finalize the audit report with all the compiled information.",
+            name="Final Report",
+            description=dedent(
+                f"""
+                Finalize the audit report with all the compiled information.
+                {self.format_version_changes()}
+                """
+            ),
             expected_output=dedent(
                 f"""
                 The finalized audit report ready for delivery to the contract developers.
@@ -692,6 +857,133 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
         )
         self.add_task(final_report)
 
+    def kickoff(self) -> CrewOutput:
+        """Run the audit in parallel and store its findings.
+
+        The category analysis tasks get their code from build_task_context,
+        which only kickoff_parallel calls, a sequential crew would analyze
+        them without any code.
+        """
+        result = self.kickoff_parallel()
+        self.save_audit(result)
+        return result
+
+    def format_code(self, function_names=None) -> str:
+        """Contract code for a task description, sliced to the given functions."""
+        if self.contract_source is None:
+            return ""
+        code = self.contract_source
+        if function_names is not None:
+            code = slice_contract_or_full(self.contract_source, function_names)
+        return f"\n\n### Contract Code\n\n```clarity\n{code}\n```\n"
+
+    def build_task_context(self, task: Task, context: str) -> str:
+        # category analysis tasks only get the functions named in their context
+        if id(task) not in self.sliced_tasks or self.contract_source is None:
+            return context
+        function_names = [
+            function.name
+            for function in self.contract_functions
+            if mentions(context, function.name)
+        ]
+        # an empty category has nothing to analyze, send no code at all
+        if not function_names:
+            return (
+                context
+                + "\n\nNo functions in this category, there is no code to analyze.\n"
+            )
+        return context + self.format_code(function_names)
+
+    def added_tasks(self, tasks: list) -> list:
+        """The given tasks that were added to the crew, for task context."""
+        return [task for task in tasks if any(task is added for added in self.tasks)]
+
+    def find_reused_functions(self) -> list:
+        """Functions with the same fingerprint as a categorized function in the prior audit."""
+        if not self.prior_audit:
+            return []
+        prior_functions = self.prior_audit.get("functions", {})
+        return [
+            name
+            for name, fingerprint in self.fingerprints.items()
+            if prior_functions.get(name, {}).get("fingerprint") == fingerprint
+            and prior_functions[name].get("category")
+        ]
+
+    def format_reused_findings(self) -> str:
+        if not self.reused_functions:
+            return ""
+        prior_functions = self.prior_audit["functions"]
+        lines = [
+            f"Functions unchanged since the audit of {self.prior_audit['contract_identifier']} were not analyzed again.",
+            "Include their prior findings in the report under the listed category:",
+        ]
+        for name in self.reused_functions:
+            finding = prior_functions[name]
+            lines.append(
+                f"- `{name}` ({finding['category']}): {finding['description']}"
+            )
+            if finding.get("analysis"):
+                lines.append(indent(finding["analysis"], "  "))
+        return "\n".join(lines)
+
+    def format_version_changes(self) -> str:
+        if not self.prior_audit:
+            return ""
+        prior_names = set(self.prior_audit.get("functions", {}))
+        changed = [
+            name for name in self.fingerprints if name not in self.reused_functions
+        ]
+        removed = sorted(prior_names - set(self.fingerprints))
+        return dedent(
+            f"""
+            Mention the changes since the audit of {self.prior_audit['contract_identifier']} in the Additional Comments:
+            - Changed or new functions: {', '.join(changed) or 'none'}
+            - Removed functions: {', '.join(removed) or 'none'}
+            - Unchanged functions: {len(self.reused_functions)}
+            """
+        )
+
+    def save_audit(self, result: CrewOutput):
+        """Store per-function findings and fingerprints for later re-audits."""
+        if self.contract_functions is None:
+            return
+        outputs = {
+            task.name: str(output.raw)
+            for task, output in zip(self.tasks, result.tasks_output)
+        }
+        prior_functions = (self.prior_audit or {}).get("functions", {})
+        findings = {}
+        for function in self.contract_functions:
+            name = function.name
+            fingerprint = self.fingerprints[name]
+            if name in self.reused_functions:
+                findings[name] = {**prior_functions[name], "fingerprint": fingerprint}
+                continue
+            findings[name] = {
+                "fingerprint": fingerprint,
+                "category": None,
+                "description": "",
+                "analysis": "",
+            }
+            for category, (list_task, analysis_task) in CATEGORY_TASKS.items():
+                descriptions = parse_function_list(outputs.get(list_task, ""), [name])
+                if name in descriptions:
+                    findings[name].update(
+                        category=category,
+                        description=descriptions[name],
+                        analysis=extract_mentions(outputs.get(analysis_task, ""), name),
+                    )
+                    break
+        AuditStore().put(
+            {
+                "contract_identifier": self.contract_identifier,
+                "timestamp": get_timestamp(),
+                "functions": findings,
+                "tasks": outputs,
+            }
+        )
+
     @staticmethod
     def get_task_inputs():
         return ["contract_identifier"]
@@ -710,6 +1002,14 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 help="Enter the full contract identifier including address and name.",
                 placeholder="e.g. SP000000000000000000002Q6VF78.pox",
             )
+            previous_identifier = st.text_input(
+                "Previous Version (optional)",
+                help="Reuse findings from a stored audit of an earlier version for functions that have not changed.",
+            )
+            fresh_audit = st.checkbox(
+                "Fresh audit",
+                help="Analyze every function again instead of reusing stored findings.",
+            )
             submitted = st.form_submit_button("Analyze Contract")
 
         if submitted and contract_identifier:
@@ -731,13 +1031,15 @@ class SmartContractAnalyzerV2(AIBTC_Crew):
                 # Create an instance of SmartContractAnalyzerV2
                 smart_contract_analyzer_crew_class = SmartContractAnalyzerV2()
                 smart_contract_analyzer_crew_class.setup_agents(llm)
-                smart_contract_analyzer_crew_class.setup_tasks(contract_identifier)
-                smart_contract_analyzer_crew = (
-                    smart_contract_analyzer_crew_class.create_crew()
+                smart_contract_analyzer_crew_class.setup_tasks(
+                    contract_identifier,
+                    previous_identifier or None,
+                    reuse_prior=not fresh_audit,
                 )
 
+                # independent analysis tasks run concurrently
                 with st.spinner("Analyzing..."):
-                    result = smart_contract_analyzer_crew.kickoff()
+                    result = smart_contract_analyzer_crew_class.kickoff()
 
                 st.success("Analysis complete!")
 
@@ -779,9 +1081,8 @@ class AgentTools:
         # see if the contract name is in the format { contract_name: value }
         if isinstance(contract_name, dict) and "contract_name" in contract_name:
             contract_name = contract_name["contract_name"]
-        return BunScriptRunner.bun_run(
-            "stacks-contracts", "get-contract-source-code.ts", contract_name
-        )
+        # checks the local source store before running the bun script
+        return fetch_contract_source(contract_name)
 
     @classmethod
     def get_all_tools(cls):
@@ -800,6 +1101,26 @@ class AgentTools:
 #########################
 
 
+def get_contract_source(contract_identifier):
+    """Get the contract source, or None if the identifier can't be resolved."""
+    contract_identifier = contract_identifier.strip()
+    if not is_contract_identifier(contract_identifier):
+        return None
+    result = fetch_contract_source(contract_identifier)
+    return result["output"] if result["success"] else None
+
+
+def parse_contract_functions(source):
+    """Parse the contract's functions, or return None if the source isn't usable."""
+    if source is None:
+        return None
+    try:
+        return extract_functions(source)
+    except ClarityParseError as e:
+        print(f"Could not parse contract source, using LLM tasks: {e}")
+        return None
+
+
 def parse_contract_identifier(identifier):
     parts = identifier.split(".")
     if len(parts) == 2:
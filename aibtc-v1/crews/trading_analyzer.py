@@ -1,10 +1,23 @@
+import difflib
 import inspect
+import os
 import streamlit as st
 from crewai import Agent, Task
 from crewai_tools import tool, Tool
 from textwrap import dedent
+from utils.backtest import parse_decision, record_decision
 from utils.crews import AIBTC_Crew, display_token_usage
-import requests
+from utils.indicators import compute_signals, format_signal_table
+from utils.market_data import get_market_data_client, normalize_token_key
+from utils.market_store import (
+    get_block_series_store,
+    price_series,
+    sync_token,
+    volume_series,
+)
+
+# blocks of stored history used for the signals
+SIGNAL_HISTORY_BLOCKS = int(os.getenv("ALEX_SIGNAL_HISTORY_BLOCKS", "5000"))
 
 
 # Custom Crew Class for Cryptocurrency Trading
@@ -22,9 +35,8 @@ class TradingAnalyzerCrew(AIBTC_Crew):
             role="Market Data Retriever",
             goal="Collect historical and real-time price data for the specified cryptocurrency, broken down by Stacks block intervals. Ensure accuracy by retrieving prices from multiple DEXs and identifying anomalies.",
             tools=[
-                AgentTools.get_crypto_price_history,
-                AgentTools.get_all_swaps,
-                AgentTools.get_pool_volume,
+                AgentTools.find_token_pools,
+                AgentTools.get_trading_signals,
             ],
             backstory=(
                 "You are a specialized market data retriever with access to various decentralized exchanges (DEXs). "
@@ -53,14 +65,12 @@ class TradingAnalyzerCrew(AIBTC_Crew):
         self.add_agent(strategy_analyzer_agent)
 
     def setup_tasks(self, crypto_symbol):
-        # Task to retrieve historical volume data
+        # Task to retrieve the computed indicators
         merge_data_task = Task(
-            description="Merges data from the into a single dataset."
-            f"Collect the information for token {crypto_symbol} using the tool `Get All Avaliable Token Info`."
-            f"Data should include the token pool volume using the tool `Get Token Pool Volume` using the pool_id"
-            f"Data should include prices using the tool `Get Token Price History` using the address",
+            description=f"Find the pool ID and token address for token {crypto_symbol} using the tool `Find Token Pools`. "
+            "Then get the computed indicators using the tool `Get Token Trading Signals` with the token address and pool ID.",
             expected_output=(
-                "A structured dataset containing volume history, including fields block height, volume, and price. The dataset should be free of gaps and anomalies, ensuring completeness for accurate analysis."
+                "The signal table returned by `Get Token Trading Signals` exactly as returned, along with the token symbol, address and pool ID used."
             ),
             agent=self.agents[0],  # market_data_agent
         )
@@ -69,17 +79,20 @@ class TradingAnalyzerCrew(AIBTC_Crew):
         # Task to analyze the price data with a trading strategy
         analyze_strategy_task = Task(
             description=(
-                f"Analyze the historical price and volume data of {crypto_symbol} over the last 100 blocks to identify trading signals. "
+                f"Analyze the computed signal table for {crypto_symbol} to identify trading signals. "
+                "The indicators are already calculated from the block-level price and volume history, do not recalculate them. "
                 "Use the following predefined strategies:\n"
-                "1. **Trend Analysis**: Evaluate using 50-period and 100-period moving averages to detect short-term and long-term trends.\n"
-                "2. **Volatility Analysis**: Calculate standard deviation and identify any sudden price spikes or drops.\n"
-                "3. **Volume Analysis**: Check for unusual volume shifts to identify potential breakouts or breakdowns.\n"
-                "4. **Support and Resistance Levels**: Identify key support and resistance levels based on price patterns.\n"
-                "5. **Momentum Indicators**: Apply RSI and MACD to detect overbought or oversold conditions.\n\n"
-                "Based on your analysis, provide a single recommendation: **Buy**, **Sell**, or **Hold**. Include a concise reason for your decision."
+                "1. **Trend Analysis**: Compare the price with the 50-period and 100-period moving averages (ma_50, ma_100) to detect short-term and long-term trends.\n"
+                "2. **Volatility Analysis**: Use the standard deviations (std_20, std_100) and max_move_z to identify any sudden price spikes or drops.\n"
+                "3. **Volume Analysis**: Use volume_ratio to check for unusual volume shifts that indicate potential breakouts or breakdowns.\n"
+                "4. **Support and Resistance Levels**: Compare the price with the support and resistance levels.\n"
+                "5. **Momentum Indicators**: Use RSI and MACD to detect overbought or oversold conditions.\n\n"
+                "Based on your analysis, provide a single recommendation: **Buy**, **Sell**, or **Hold**. Include a concise reason for your decision. "
+                "End your answer with a line of exactly `Recommendation: Buy`, `Recommendation: Sell` or `Recommendation: Hold`."
             ),
-            expected_output="A recommendation of either 'Buy', 'Sell', or 'Hold', along with a brief explanation justifying your decision based on the analysis.",
-            agent=self.agents[1],  # market_data_agent
+            expected_output="A brief explanation justifying your decision based on the analysis, ending with the line 'Recommendation: <Buy|Sell|Hold>'.",
+            agent=self.agents[1],  # strategy_analyzer_agent
+            context=[merge_data_task],
         )
         self.add_task(analyze_strategy_task)
 
@@ -136,6 +149,9 @@ class TradingAnalyzerCrew(AIBTC_Crew):
                 result_str = str(result.raw)
                 st.markdown(result_str)
 
+                # keep the decision so run_backtest.py can replay it later
+                save_decision(crypto_symbol, result_str)
+
                 # Display disclaimer
                 st.markdown(
                     """### Disclaimer
@@ -158,19 +174,7 @@ class AgentTools:
     @tool("Get Token Price History")
     def get_crypto_price_history(token_address: str):
         """Retrieve historical price data for a specified cryptocurrency symbol."""
-        url = f"https://api.alexgo.io/v1/price_history/{token_address}?limit=100"
-        headers = {
-            "Accept": "application/json",
-        }
-
-        response = requests.get(url, headers=headers)
-
-        if not response.ok:
-            raise Exception(
-                f"Failed to get token price history: {response.status_text}"
-            )
-
-        data = response.json()
+        data = get_market_data_client().get_price_history(token_address)
 
         price_history = data.get("prices", [])
         formatted_history = "\n".join(
@@ -184,17 +188,7 @@ class AgentTools:
     @tool("Get All Avaliable Token Info")
     def get_all_swaps():
         """Retrieve all swap data from the Alex API and return a formatted string."""
-        url = "https://api.alexgo.io/v1/allswaps"
-        headers = {
-            "Accept": "application/json",
-        }
-
-        response = requests.get(url, headers=headers)
-
-        if not response.ok:
-            raise Exception(f"Failed to get all swaps: {response.status_text}")
-
-        data = response.json()
+        data = get_market_data_client().get_all_swaps()
 
         formatted_swaps = "\n".join(
             dedent(
@@ -205,21 +199,28 @@ class AgentTools:
 
         return formatted_swaps
 
+    @staticmethod
+    @tool("Find Token Pools")
+    def find_token_pools(symbol: str):
+        """Look up the ALEX pool IDs and token address for a token symbol (e.g. WELSH) or token address."""
+        pools = get_market_data_client().find_pools(symbol)
+        if not pools:
+            close_matches = difflib.get_close_matches(
+                normalize_token_key(symbol),
+                get_market_data_client().get_swap_index().keys(),
+                n=5,
+            )
+            return f"No pools found for {symbol}. Close matches: {', '.join(close_matches) or 'none'}"
+        return "\n".join(
+            f"Pool ID: {pool['pool_id']}, Quote: {pool['quote']}, Symbol: {pool['symbol']}, Address: {pool['token_address']}"
+            for pool in pools
+        )
+
     @staticmethod
     @tool("Get Token Pool Volume History")
     def get_pool_volume(pool_token_id: str):
         """Retrieve pool volume data for a specified pool token ID."""
-        url = f"https://api.alexgo.io/v1/pool_volume/{pool_token_id}?limit=100"
-        headers = {
-            "Accept": "application/json",
-        }
-
-        response = requests.get(url, headers=headers)
-
-        if not response.ok:
-            raise Exception(f"Failed to get pool volume: {response.status_text}")
-
-        data = response.json()
+        data = get_market_data_client().get_pool_volume(pool_token_id)
 
         volume_values = data.get("volume_values", [])
         formatted_volume = "\n".join(
@@ -229,6 +230,30 @@ class AgentTools:
 
         return f"Token: {data['token']}\n{formatted_volume}"
 
+    @staticmethod
+    @tool("Get Token Trading Signals")
+    def get_trading_signals(token_address: str, pool_token_id: str):
+        """Compute moving averages, volatility, RSI, MACD, support/resistance and volume signals for a token address and its pool token ID."""
+        # only blocks newer than the stored history are fetched
+        store = get_block_series_store()
+        sync_token(get_market_data_client(), store, token_address, pool_token_id)
+        price_blocks, prices = store.load(
+            price_series(token_address), SIGNAL_HISTORY_BLOCKS
+        )
+        volume_blocks, volumes = store.load(
+            volume_series(pool_token_id), SIGNAL_HISTORY_BLOCKS
+        )
+        if not len(prices):
+            return f"No price history found for {token_address}"
+
+        signals = compute_signals(price_blocks, prices, volume_blocks, volumes)
+        gaps = "".join(
+            f"\nNote: no price history between blocks {after} and {before}"
+            for after, before in store.list_gaps(price_series(token_address))
+            if before > price_blocks[0]
+        )
+        return f"Token: {token_address}\n{format_signal_table(signals)}{gaps}"
+
     @classmethod
     def get_all_tools(cls):
         members = inspect.getmembers(cls)
@@ -239,3 +264,24 @@ class AgentTools:
             or (hasattr(member, "__wrapped__") and isinstance(member.__wrapped__, Tool))
         ]
         return tools
+
+
+#########################
+# Helper Functions
+#########################
+
+
+def save_decision(crypto_symbol: str, result: str):
+    """Record the crew's Buy/Sell/Hold with the latest block it was based on.
+
+    A result without a recommendation line is recorded as unparsed, so the
+    log shows it and the backtester skips it.
+    """
+    decision = parse_decision(result)
+    pools = get_market_data_client().find_pools(crypto_symbol)
+    if not pools:
+        return
+    token_address = pools[0]["token_address"]
+    block_height = get_block_series_store().latest_height(price_series(token_address))
+    if block_height is not None:
+        record_decision(crypto_symbol, token_address, block_height, decision)
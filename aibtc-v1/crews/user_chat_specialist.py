@@ -239,13 +239,17 @@ class AgentTools:
             crew_class = SmartContractAnalyzerV2(st.session_state.embedder)
             crew_class.setup_agents(st.session_state.llm)
             crew_class.setup_tasks(contract_identifier)
-            crew = crew_class.create_crew()
-            crew.step_callback = chat_tool_callback
-            crew.task_callback = chat_task_callback
-            crew.planning = True
             set_active_crew(crew_class.name)
             update_status(f"Executing {crew_class.name}...", "running")
-            result = crew.kickoff()
+            # tasks get sliced contract code at run time, which needs the
+            # parallel runner instead of a sequential crew. crew planning is
+            # left out: it only runs inside Crew.kickoff, and it would plan
+            # the category tasks before they know which code they analyze
+            result = crew_class.kickoff_parallel(
+                step_callback=chat_tool_callback,
+                task_callback=chat_task_callback,
+            )
+            crew_class.save_audit(result)
             return result
         except Exception as e:
             return f"Error executing Smart Contract Analyzer Crew: {e}"
@@ -1,10 +1,22 @@
 import inspect
+import os
 import streamlit as st
 from crewai import Agent, Task
 from crewai_tools import tool, Tool
 from textwrap import dedent
 from utils.crews import AIBTC_Crew, display_token_usage
 from utils.scripts import BunScriptRunner, get_timestamp
+from utils.wallet_analytics import (
+    format_portfolio_analytics,
+    format_time,
+    format_wallet_analytics,
+)
+from utils.wallet_store import (
+    get_wallet_store,
+    ingest_address_transactions,
+    sync_address,
+    sync_wallets,
+)
 
 
 class WalletSummaryCrew(AIBTC_Crew):
@@ -26,6 +38,7 @@ class WalletSummaryCrew(AIBTC_Crew):
                 """
             ),
             tools=[
+                AgentTools.get_wallet_overview,
                 AgentTools.get_address_balance_detailed,
                 AgentTools.get_address_transactions,
                 AgentTools.get_bns_address,
@@ -46,7 +59,7 @@ class WalletSummaryCrew(AIBTC_Crew):
         pattern_recognizer = Agent(
             role="Pattern Recognition Specialist",
             goal="Identify recurring patterns, unusual activities, and long-term trends in wallet behavior.",
-            tools=[],
+            tools=[AgentTools.get_transaction_history],
             backstory=dedent(
                 """
                 You are an expert in blockchain data analysis with a keen eye for patterns and anomalies.
@@ -64,6 +77,7 @@ class WalletSummaryCrew(AIBTC_Crew):
             description=dedent(
                 f"""
                 Retrieve detailed wallet balance information for the specified address.
+                Use the `Get Wallet Overview` tool to fetch the balance and recent transactions in a single call.
 
                 **Address:** {address}
 
@@ -78,10 +92,12 @@ class WalletSummaryCrew(AIBTC_Crew):
         retrieve_transactions_task = Task(
             description=dedent(
                 f"""
-                Retrieve the last transactions associated with the following address:
+                Summarize the last transactions associated with the following address:
 
                 **Address:** {address}
 
+                The transactions were already retrieved with the wallet overview, only fetch them again if they are missing.
+
                 Ensure your summary is clear and focuses on the actual data within the transactions. Do not describe or summarize the structure of the data itself.
                 """
             ),
@@ -102,6 +118,7 @@ class WalletSummaryCrew(AIBTC_Crew):
                 """
             ),
             agent=self.agents[0],  # wallet_agent
+            context=[retrieve_wallet_info_task],
         )
         self.add_task(retrieve_transactions_task)
 
@@ -109,7 +126,10 @@ class WalletSummaryCrew(AIBTC_Crew):
             description=dedent(
                 f"""
                 Analyze the historical data for the wallet address: {address}
-                
+
+                Use the `Get Wallet Transaction History` tool to load the full transaction history, not only the recent transactions.
+                It returns tables computed from every stored transaction, base your analysis on those figures rather than estimating them.
+
                 Your analysis should include:
                 1. Trends in transaction frequency and volume over time
                 2. Changes in asset holdings (STX, NFTs, FTs) over time
@@ -138,12 +158,25 @@ class WalletSummaryCrew(AIBTC_Crew):
         )
 
         with st.form("wallet_summary_form"):
-            address = st.text_input("Address", help="Enter the wallet address")
+            address_input = st.text_area(
+                "Addresses",
+                help="Enter a wallet address or BNS name, several (one per line) for a combined portfolio analysis",
+            )
             submitted = st.form_submit_button("Analyze Wallet")
 
-        if submitted and address:
+        addresses = parse_addresses(address_input)
+        if submitted and len(addresses) > 1:
+            self.render_portfolio(addresses)
+        elif submitted and addresses:
             st.subheader("Analysis Progress")
             try:
+                # the tools and task descriptions all work on the resolved
+                # address, so a BNS name is only looked up once
+                resolved, errors = resolve_addresses(addresses)
+                if errors:
+                    raise ValueError(f"{addresses[0]}: {errors[addresses[0]]}")
+                address = resolved[0]
+
                 st.write("Step Progress:")
                 st.session_state.crew_step_container = st.empty()
                 st.write("Task Progress:")
@@ -154,7 +187,7 @@ class WalletSummaryCrew(AIBTC_Crew):
 
                 llm = st.session_state.llm
 
-                wallet_summary_crew_class = WalletSummaryCrew()
+                wallet_summary_crew_class = WalletSummaryCrew(st.session_state.embedder)
                 wallet_summary_crew_class.setup_agents(llm)
                 wallet_summary_crew_class.setup_tasks(address)
                 wallet_summary_crew = wallet_summary_crew_class.create_crew()
@@ -188,6 +221,95 @@ class WalletSummaryCrew(AIBTC_Crew):
                 "Enter Wallet Address, then click 'Analyze Wallet' to see results."
             )
 
+    def render_portfolio(self, entries: list):
+        st.subheader("Portfolio Analysis")
+        try:
+            with st.spinner("Syncing wallets..."):
+                addresses, errors = resolve_addresses(entries)
+                wallets = sync_wallets(
+                    addresses,
+                    get_wallet_store(),
+                    max_pages=int(os.getenv("AIBTC_WALLET_SYNC_PAGES", "40")),
+                )
+                wallets.update(
+                    {name: {"error": error} for name, error in errors.items()}
+                )
+                analytics = format_portfolio_analytics(get_wallet_store(), wallets)
+
+            with st.expander("Portfolio Analytics"):
+                st.markdown(analytics)
+
+            portfolio_crew = create_portfolio_crew(
+                analytics, st.session_state.llm, st.session_state.embedder
+            )
+
+            with st.spinner("Summarizing..."):
+                result = portfolio_crew.kickoff()
+
+            st.success("Analysis complete!")
+            display_token_usage(result.token_usage)
+            st.subheader("Analysis Results")
+            result_str = str(result.raw)
+            st.markdown(result_str)
+            st.download_button(
+                label="Download Portfolio Report (Text)",
+                data=f"{result_str}\n\n{analytics}",
+                file_name=f"{get_timestamp()}_wallet_portfolio_analysis.txt",
+                mime="text/plain",
+            )
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+            st.write("Please check your inputs and try again.")
+
+
+# summarizes several wallets from precomputed analytics in a single llm call,
+# instead of running the wallet crew once per address. a plain AIBTC_Crew
+# rather than a subclass, so it is not listed as a crew of its own
+def create_portfolio_crew(analytics: str, llm, embedder):
+    portfolio_crew = AIBTC_Crew(
+        "Wallet Portfolio Summarizer",
+        "This crew summarizes the combined activity and holdings of several wallets on the Stacks blockchain.",
+        embedder,
+    )
+    portfolio_analyst = Agent(
+        role="Treasury Portfolio Analyst",
+        goal="Summarize the holdings and activity of a set of wallets as one portfolio, highlighting what needs attention.",
+        tools=[],
+        backstory=dedent(
+            """
+            You are a blockchain treasury analyst who reports on groups of wallets on the Stacks blockchain.
+            You work from precomputed tables and never invent figures that are not in them.
+            """
+        ),
+        verbose=True,
+        llm=llm,
+    )
+    portfolio_crew.add_agent(portfolio_analyst)
+
+    summarize_portfolio_task = Task(
+        name="Summarize Portfolio",
+        description=dedent(
+            f"""
+            Summarize the following wallet portfolio using only the figures in these tables:
+
+            {analytics}
+
+            Your summary should include:
+            1. Combined holdings and how they are spread across the wallets
+            2. Trends in combined activity over time
+            3. The most used contracts and the main outside counterparties
+            4. Movements between the wallets and any wallet with unusual activity
+            5. Wallets that could not be synced, if any
+            """
+        ),
+        expected_output="A concise portfolio report with a short section per point, referring to wallets by address.",
+        agent=portfolio_analyst,
+    )
+    portfolio_crew.add_task(summarize_portfolio_task)
+
+    # memory would add llm calls of its own to the single summary
+    return portfolio_crew.create_crew(memory=False)
+
 
 #########################
 # Agent Tools
@@ -218,6 +340,66 @@ class AgentTools:
             "stacks-wallet", "get-transactions-by-address.ts", address
         )
 
+    @staticmethod
+    @tool("Get Wallet Overview")
+    def get_wallet_overview(address: str):
+        """Get detailed balance information and the 20 most recent transactions for a given address or BNS name in one call."""
+        # helper if address is sent as json
+        if isinstance(address, dict) and "address" in address:
+            address = address["address"]
+        # resolve bns names (e.g. name.btc) before fetching wallet data
+        if "." in address:
+            result = BunScriptRunner.bun_run(
+                "stacks-bns", "get-address-by-bns.ts", address
+            )
+            if not result["success"]:
+                return result
+            address = result["output"].strip()
+        # only transactions newer than the indexed block are fetched, and the
+        # balance snapshot is reused until the wallet has new transactions,
+        # otherwise it is fetched while the transactions are ingested
+        store = get_wallet_store()
+        synced = sync_address(address, store, max_pages=1)
+        return {
+            "address": address,
+            "balance": synced["balance"],
+            "transactions": [
+                {**transaction, "block_time": format_time(transaction["block_time"])}
+                for transaction in store.recent_transactions(address, 20)
+            ],
+        }
+
+    @staticmethod
+    @tool("Get Wallet Transaction History")
+    def get_transaction_history(address: str):
+        """Sync the full transaction history of an address or BNS name into the local store and return activity, contract call, counterparty and token flow tables computed from it."""
+        # helper if address is sent as json
+        if isinstance(address, dict) and "address" in address:
+            address = address["address"]
+        addresses, errors = resolve_addresses([address.strip()])
+        if errors:
+            return {"output": "", "error": errors[address.strip()], "success": False}
+        address = addresses[0]
+        # large wallets are ingested over several calls, the cursor is kept
+        result = ingest_address_transactions(
+            address,
+            get_wallet_store(),
+            max_pages=int(os.getenv("AIBTC_WALLET_SYNC_PAGES", "40")),
+        )
+        types = get_wallet_store().summary(address)["types"]
+        history = (
+            "complete" if result["complete"] else "partial, call again to continue"
+        )
+        status = dedent(
+            f"""
+            Address: {address}
+            Stored transactions: {result["stored"]} of {result["total"]} ({history}), {result["added"]} new
+            Transaction types: {", ".join(f"{name} {count}" for name, count in types.items()) or "none"}
+            """
+        ).strip()
+        # aggregates instead of raw transactions keep the prompt small
+        return status + "\n\n" + format_wallet_analytics(get_wallet_store(), address)
+
     @staticmethod
     @tool("Translate BNS Name to Address")
     def get_bns_address(name: str):
@@ -234,3 +416,32 @@ class AgentTools:
             or (hasattr(member, "__wrapped__") and isinstance(member.__wrapped__, Tool))
         ]
         return tools
+
+
+#########################
+# Helper Functions
+#########################
+
+
+def parse_addresses(text: str) -> list:
+    """Addresses or BNS names separated by lines, commas or spaces, in order."""
+    entries = text.replace(",", " ").split() if text else []
+    return list(dict.fromkeys(entries))
+
+
+def resolve_addresses(entries: list):
+    """Resolve BNS names in one concurrent batch, returning addresses and errors."""
+    names = [entry for entry in entries if "." in entry]
+    results = BunScriptRunner.bun_run_many(
+        [("stacks-bns", "get-address-by-bns.ts", name) for name in names]
+    )
+    resolved = dict(zip(names, results))
+    addresses, errors = [], {}
+    for entry in entries:
+        if entry not in resolved:
+            addresses.append(entry)
+        elif resolved[entry]["success"] and resolved[entry]["output"].strip():
+            addresses.append(resolved[entry]["output"].strip())
+        else:
+            errors[entry] = resolved[entry].get("error") or "BNS name not found"
+    return list(dict.fromkeys(addresses)), errors
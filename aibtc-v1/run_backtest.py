@@ -0,0 +1,104 @@
+"""Backtest trading signals on stored block-level price history.
+
+Run from the repository root, fully offline:
+
+    python aibtc-v1/run_backtest.py
+    python aibtc-v1/run_backtest.py SP...ADDRESS.token-alex --window 500
+    python aibtc-v1/run_backtest.py --fixture prices-alex.json prices-welsh.json
+    python aibtc-v1/run_backtest.py --decisions
+
+Prices come from the local series store that the trading analyzer syncs
+(ALEX_HISTORY_DB), or from fixture files saved from the ALEX price_history
+endpoint. The indicator rules are always tested; --decisions also replays the
+Buy/Sell/Hold decisions recorded from Trading Analyzer runs.
+"""
+
+import argparse
+import json
+from dotenv import load_dotenv
+from utils.backtest import (
+    UNPARSED_DECISION,
+    decision_signals,
+    format_backtest_table,
+    load_decisions,
+    run_backtest,
+    stack_series,
+)
+from utils.market_store import BlockSeriesStore, price_series
+
+
+def load_fixture(path: str):
+    with open(path) as f:
+        data = json.load(f)
+    prices = data.get("prices", [])
+    return data["token"], (
+        [price["block_height"] for price in prices],
+        [price["avg_price_usd"] for price in prices],
+    )
+
+
+def load_series(args):
+    if args.fixture:
+        return [load_fixture(path) for path in args.fixture]
+    store = BlockSeriesStore(args.db)
+    tokens = args.tokens or [
+        series.split(":", 1)[1] for series in store.list_series("price:")
+    ]
+    for token in tokens:
+        for after, before in store.list_gaps(price_series(token)):
+            print(f"Warning: {token} has no prices between blocks {after} and {before}")
+    return [(token, store.load(price_series(token))) for token in tokens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tokens", nargs="*", help="token addresses, default all stored")
+    parser.add_argument("--db", help="series store path, default ALEX_HISTORY_DB")
+    parser.add_argument("--fixture", nargs="+", help="price_history json files")
+    parser.add_argument(
+        "--decisions",
+        nargs="?",
+        const="",
+        help="replay recorded crew decisions, default ALEX_DECISIONS_LOG",
+    )
+    parser.add_argument(
+        "--window", type=int, default=1000, help="price points per window"
+    )
+    parser.add_argument(
+        "--stride", type=int, default=100, help="price points between windows"
+    )
+    parser.add_argument("--fee", type=float, default=0.003, help="cost per trade")
+    parser.add_argument(
+        "--horizon", type=int, default=10, help="price points used to score a trade"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    loaded = [(token, series) for token, series in load_series(args) if len(series[0])]
+    if not loaded:
+        parser.error("no price history to backtest, run the trading analyzer first")
+    tokens = [token for token, _ in loaded]
+    series = [series for _, series in loaded]
+    options = dict(
+        window=args.window, stride=args.stride, fee=args.fee, horizon=args.horizon
+    )
+
+    print("## Indicator Rules\n")
+    print(format_backtest_table(run_backtest(tokens, series, **options)))
+
+    if args.decisions is not None:
+        decisions = load_decisions(args.decisions or None)
+        blocks, _ = stack_series(series)
+        signals = decision_signals(blocks, tokens, decisions)
+        unparsed = sum(
+            decision["decision"] == UNPARSED_DECISION for decision in decisions
+        )
+        print(
+            f"\n## Recorded Crew Decisions ({len(decisions)} recorded, "
+            f"{unparsed} unparsed and skipped)\n"
+        )
+        print(format_backtest_table(run_backtest(tokens, series, signals, **options)))
+
+
+if __name__ == "__main__":
+    main()
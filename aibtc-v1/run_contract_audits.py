@@ -0,0 +1,177 @@
+"""Headless batch audits with the Smart Contract Analyzer V2 crew.
+
+Run from the repository root:
+
+    python aibtc-v1/run_contract_audits.py SP000000000000000000002Q6VF78.pox
+    python aibtc-v1/run_contract_audits.py --file contracts.txt --concurrency 3
+    python aibtc-v1/run_contract_audits.py --deployer SP2...ADDRESS
+    python aibtc-v1/run_contract_audits.py SP2...ADDRESS.token-v2 --previous SP2...ADDRESS.token
+    python aibtc-v1/run_contract_audits.py SP000000000000000000002Q6VF78.pox --fresh
+
+Each finished report is written to the output directory as JSON and Markdown
+as soon as it completes, and throughput is printed at the end. Findings are
+also stored per function, so re-auditing a new version of a contract only
+analyzes the functions that changed, --fresh analyzes everything again.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from crewai import LLM
+from dotenv import load_dotenv
+from crews.smart_contract_analyzer_v2 import SmartContractAnalyzerV2
+from utils.scripts import get_timestamp
+from utils.stacks_api import list_deployed_contracts
+
+
+def create_llm():
+    """One LLM client shared by every audit, configured like the Streamlit app."""
+    return LLM(
+        model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
+        api_key=os.getenv("OPENAI_API_KEY", ""),
+        base_url=os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1"),
+    )
+
+
+def create_embedder():
+    return {
+        "provider": os.getenv("OPENAI_EMBEDDER_PROVIDER", "openai"),
+        "config": {
+            "model": os.getenv("OPENAI_EMBEDDER_MODEL", "text-embedding-3-small")
+        },
+    }
+
+
+def audit_contract(
+    contract_identifier: str,
+    llm,
+    embedder,
+    max_tasks: int,
+    previous_identifier: str = None,
+    reuse_prior: bool = True,
+) -> dict:
+    """Run a full audit for one contract and return a JSON-serializable result."""
+    start = time.time()
+    crew_class = SmartContractAnalyzerV2(embedder)
+    crew_class.setup_agents(llm)
+    crew_class.setup_tasks(contract_identifier, previous_identifier, reuse_prior)
+    result = crew_class.kickoff_parallel(
+        max_workers=max_tasks, step_callback=None, task_callback=None
+    )
+    crew_class.save_audit(result)
+    return {
+        "contract_identifier": contract_identifier,
+        "timestamp": get_timestamp(),
+        "duration_seconds": round(time.time() - start, 2),
+        "token_usage": {
+            "total_tokens": result.token_usage.total_tokens,
+            "prompt_tokens": result.token_usage.prompt_tokens,
+            "completion_tokens": result.token_usage.completion_tokens,
+            "successful_requests": result.token_usage.successful_requests,
+        },
+        "reused_functions": crew_class.reused_functions,
+        "report": str(result.raw),
+        "tasks": [task_output.raw for task_output in result.tasks_output],
+    }
+
+
+def write_report(output_dir: str, result: dict):
+    base_path = os.path.join(output_dir, result["contract_identifier"])
+    with open(f"{base_path}.json", "w") as f:
+        json.dump(result, f, indent=2)
+    with open(f"{base_path}.md", "w") as f:
+        f.write(result["report"])
+
+
+def read_identifiers(args) -> list:
+    identifiers = list(args.contracts)
+    if args.file:
+        with open(args.file) as f:
+            identifiers.extend(line.strip() for line in f if line.strip())
+    if args.deployer:
+        identifiers.extend(list_deployed_contracts(args.deployer))
+    # keep the first occurrence of each contract
+    return list(dict.fromkeys(identifiers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("contracts", nargs="*", help="ADDRESS.CONTRACT_NAME")
+    parser.add_argument("--file", help="file with one contract identifier per line")
+    parser.add_argument("--deployer", help="audit every contract deployed by address")
+    parser.add_argument(
+        "--previous", help="earlier version of the contract to reuse findings from"
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="analyze every function again instead of reusing stored findings",
+    )
+    parser.add_argument("--output-dir", default="./audits")
+    parser.add_argument(
+        "--concurrency", type=int, default=2, help="contracts audited at once"
+    )
+    parser.add_argument(
+        "--max-tasks", type=int, default=4, help="parallel tasks per contract"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    identifiers = read_identifiers(args)
+    if not identifiers:
+        parser.error("no contracts to audit")
+    if args.previous and len(identifiers) > 1:
+        parser.error("--previous can only be used when auditing one contract")
+    if args.previous and args.fresh:
+        parser.error("--previous and --fresh can't be used together")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    llm = create_llm()
+    embedder = create_embedder()
+    completed = []
+    failed = []
+    start = time.time()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {
+            executor.submit(
+                audit_contract,
+                identifier,
+                llm,
+                embedder,
+                args.max_tasks,
+                args.previous,
+                not args.fresh,
+            ): identifier
+            for identifier in identifiers
+        }
+        for future in as_completed(futures):
+            identifier = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append(identifier)
+                print(f"[failed] {identifier}: {e}")
+                continue
+            write_report(args.output_dir, result)
+            completed.append(result)
+            print(
+                f"[done] {identifier} in {result['duration_seconds']}s, "
+                f"{result['token_usage']['total_tokens']} tokens, "
+                f"{len(result['reused_functions'])} functions reused"
+            )
+
+    elapsed_hours = (time.time() - start) / 3600
+    total_tokens = sum(r["token_usage"]["total_tokens"] for r in completed)
+    print(f"\nAudited {len(completed)} of {len(identifiers)} contracts")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    if completed:
+        print(f"Throughput: {len(completed) / elapsed_hours:.1f} contracts/hour")
+        print(f"Tokens: {total_tokens / len(completed):.0f} tokens/contract")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Build the Clarity book vector store collections used by the search tools.
+
+Run from the repository root:
+
+    python aibtc-v1/run_vector_ingest.py
+    python aibtc-v1/run_vector_ingest.py clarity_book_code --chunk-size 800
+    python aibtc-v1/run_vector_ingest.py --backend numpy --nlist 16
+
+Pages are fetched, split and embedded here once, and the collections are
+written to AIBTC_VECTOR_STORE_PATH (default ./chroma). The app only opens
+them on the first search. Chunk ids are content hashes, so running it again
+only embeds chunks that changed and deletes the ones that are gone.
+
+--backend numpy writes memory-mapped indexes to AIBTC_VECTOR_INDEX_PATH
+(default ./cache/vector_index) for AIBTC_VECTOR_BACKEND=numpy instead.
+"""
+
+import argparse
+import time
+from dotenv import load_dotenv
+from utils.vector import (
+    CLARITY_BOOK_CORPORA,
+    build_vector_index,
+    get_chroma_client,
+    split_documents,
+    sync_collection,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "corpora",
+        nargs="*",
+        help=f"collections to build, default all of {', '.join(CLARITY_BOOK_CORPORA)}",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default="chroma")
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=0,
+        help="IVF lists for the numpy index, 0 for exact",
+    )
+    args = parser.parse_args()
+    unknown = set(args.corpora) - set(CLARITY_BOOK_CORPORA)
+    if unknown:
+        parser.error(f"unknown corpora: {', '.join(sorted(unknown))}")
+
+    load_dotenv()
+    for name in args.corpora or sorted(CLARITY_BOOK_CORPORA):
+        start = time.perf_counter()
+        splits = split_documents(
+            CLARITY_BOOK_CORPORA[name], args.chunk_size, args.chunk_overlap
+        )
+        if args.backend == "numpy":
+            index = build_vector_index(name, splits, nlist=args.nlist)
+            print(
+                f"{name}: {index.count()} chunks, {index.meta['nlist']} lists "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+            continue
+        collection = get_chroma_client().get_or_create_collection(name=name)
+        changes = sync_collection(collection, splits)
+        print(
+            f"{name}: {changes['added']} added, {changes['removed']} removed, "
+            f"{changes['unchanged']} unchanged, {collection.count()} chunks "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
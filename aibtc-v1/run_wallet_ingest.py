@@ -0,0 +1,49 @@
+"""Ingest the full transaction history of Stacks addresses into the local store.
+
+Run from the repository root:
+
+    python aibtc-v1/run_wallet_ingest.py SP2...ADDRESS SP3...ADDRESS
+    python aibtc-v1/run_wallet_ingest.py SP2...ADDRESS --max-pages 20
+
+Pages are committed one at a time with their cursor, so an interrupted or
+page-limited run continues where it stopped, and later runs only fetch the
+transactions that are new since the last one.
+"""
+
+import argparse
+from dotenv import load_dotenv
+from utils.wallet_store import WalletStore, ingest_address_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("addresses", nargs="+")
+    parser.add_argument("--db", help="wallet store path, default AIBTC_WALLET_DB")
+    parser.add_argument(
+        "--max-pages", type=int, default=None, help="pages per address this run"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    store = WalletStore(args.db)
+    for address in args.addresses:
+
+        def on_page(progress):
+            print(
+                f"{address} {progress['stage']}: +{progress['added']} "
+                f"({progress['backfill_offset']}/{progress['total']})",
+                end="\r",
+            )
+
+        result = ingest_address_transactions(
+            address, store, max_pages=args.max_pages, on_page=on_page
+        )
+        status = "complete" if result["complete"] else "partial"
+        print(
+            f"{address}: {result['added']} new, {result['stored']} of "
+            f"{result['total']} stored ({status}) in {result['pages']} pages"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional
+from utils.contracts import is_contract_identifier, write_atomic
+
+
+# audit results are stored per contract with function fingerprints so a
+# re-audit of a new version only has to analyze the functions that changed
+class AuditStore:
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("AIBTC_AUDIT_CACHE_DIR", "./cache/audits")
+
+    def get(self, contract_identifier: str) -> Optional[dict]:
+        """Return the stored audit for a contract, or None if not stored."""
+        if not is_contract_identifier(contract_identifier):
+            return None
+        try:
+            with open(os.path.join(self.path, f"{contract_identifier}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, audit: dict):
+        contract_identifier = audit["contract_identifier"]
+        if not is_contract_identifier(contract_identifier):
+            return
+        os.makedirs(self.path, exist_ok=True)
+        write_atomic(
+            os.path.join(self.path, f"{contract_identifier}.json"),
+            json.dumps(audit, indent=2),
+        )
+
+
+def mentions(text: str, name: str) -> bool:
+    """True if a Clarity name appears in text as a whole word."""
+    return bool(re.search(rf"(?<![\w-]){re.escape(name)}(?![\w-])", text))
+
+
+def parse_function_list(output: str, function_names: Iterable[str]) -> Dict[str, str]:
+    """Map known function names to their descriptions in a markdown list."""
+    function_names = set(function_names)
+    descriptions = {}
+    for line in output.splitlines():
+        match = re.match(r"\s*[-*]\s+(.+?)\s*:\s*(.*)", line)
+        if not match:
+            continue
+        # list items are often wrapped in backticks or bold
+        name = match.group(1).strip("`* ")
+        if name in function_names and name not in descriptions:
+            descriptions[name] = match.group(2).strip()
+    return descriptions
+
+
+def extract_mentions(output: str, name: str) -> str:
+    """Paragraphs of a task output that mention the given function."""
+    paragraphs = re.split(r"\n\s*\n", output)
+    return "\n\n".join(p.strip() for p in paragraphs if mentions(p, name))
@@ -0,0 +1,293 @@
+import json
+import os
+import re
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Sequence, Tuple
+from utils.indicators import macd, rsi, sma, sort_by_block
+
+# buy and sell signals are +1 and -1, 0 keeps the current position
+DECISIONS = {"buy": 1, "sell": -1, "hold": 0}
+
+# recorded when a crew result has no recommendation line, never replayed
+UNPARSED_DECISION = "unparsed"
+
+# "Recommendation: Hold", also with markdown like "**Recommendation:** **Hold**"
+RECOMMENDATION_PATTERN = re.compile(
+    r"^[\s*_#>-]*recommendation[\s*_]*:[\s*_]*(buy|sell|hold)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def stack_series(
+    series: Sequence[Tuple[np.ndarray, np.ndarray]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Put each (block_heights, values) series in a row of its own points.
+
+    Rows are sorted oldest first and padded at the end, values with NaN and
+    block heights with the largest int64, so indicators, windows and the hit
+    rate horizon count a token's own points and a token's result never
+    depends on which other tokens are in the same run.
+    """
+    length = max((len(blocks) for blocks, _ in series), default=0)
+    block_matrix = np.full((len(series), length), np.iinfo(np.int64).max)
+    matrix = np.full((len(series), length), np.nan)
+    for row, (blocks, values) in enumerate(series):
+        blocks, values = sort_by_block(blocks, values)
+        block_matrix[row, : len(blocks)] = blocks
+        matrix[row, : len(values)] = values
+    return block_matrix, matrix
+
+
+def shift_rows(matrix: np.ndarray, offsets: np.ndarray, fill) -> np.ndarray:
+    """Shift each row left by its offset (right if negative), filling the gap."""
+    columns = np.arange(matrix.shape[-1])
+    source = columns + offsets[:, None]
+    inside = (source >= 0) & (source < matrix.shape[-1])
+    shifted = np.take_along_axis(
+        matrix, np.clip(source, 0, matrix.shape[-1] - 1), axis=-1
+    )
+    return np.where(inside, shifted, fill)
+
+
+def rule_signals(prices: np.ndarray) -> np.ndarray:
+    """Signals from the indicator rules the strategy task is asked to apply.
+
+    Buy on an uptrend (MA50 above MA100) with positive MACD momentum that is
+    not overbought, sell on a downtrend with negative momentum or when RSI is
+    above 80.
+    """
+    # a series can start with missing prices, the indicators need each
+    # row's history to start at column 0 so leading NaNs don't spread
+    first = np.argmax(~np.isnan(prices), axis=-1)
+    prices = shift_rows(prices, first, np.nan)
+    trend = sma(prices, 50) - sma(prices, 100)
+    momentum = macd(prices)[2]
+    strength = rsi(prices)
+    # comparisons with NaN are False, so missing history means hold
+    with np.errstate(invalid="ignore"):
+        buy = (trend > 0) & (momentum > 0) & (strength < 70)
+        sell = ((trend < 0) & (momentum < 0)) | (strength > 80)
+    signals = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+    return shift_rows(signals, -first, 0).astype(np.int8)
+
+
+def decision_signals(
+    blocks: np.ndarray, tokens: List[str], decisions: List[dict]
+) -> np.ndarray:
+    """Signals from recorded crew decisions, at their token's last point at or before their block."""
+    signals = np.zeros(blocks.shape, dtype=np.int8)
+    rows = {token: row for row, token in enumerate(tokens)}
+    for decision in decisions:
+        signal = DECISIONS.get(decision["decision"].lower())
+        row = rows.get(decision["token_address"])
+        if signal is None or row is None:
+            continue
+        column = (
+            np.searchsorted(blocks[row], decision["block_height"], side="right") - 1
+        )
+        if column < 0:
+            continue
+        signals[row, column] = signal
+    return signals
+
+
+def positions_from_signals(signals: np.ndarray) -> np.ndarray:
+    """1 while long and 0 while flat, holding the last buy or sell signal."""
+    columns = np.arange(signals.shape[-1])
+    last_signal = np.maximum.accumulate(np.where(signals != 0, columns, -1), axis=-1)
+    latest = np.take_along_axis(signals, np.maximum(last_signal, 0), axis=-1)
+    return ((last_signal >= 0) & (latest == 1)).astype(np.float64)
+
+
+def strategy_returns(
+    prices: np.ndarray, positions: np.ndarray, fee: float = 0.003
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-block log returns of the strategy and of buy and hold.
+
+    A position taken at a block applies to the move to the next block, and
+    every change in position before the last known price pays the fee.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        market = np.diff(np.log(prices), axis=-1)
+    market = np.nan_to_num(market, nan=0.0, posinf=0.0, neginf=0.0)
+    held = positions[..., :-1]
+    columns = np.arange(prices.shape[-1] - 1)
+    last = prices.shape[-1] - 1 - np.argmax(~np.isnan(prices[..., ::-1]), axis=-1)
+    trades = np.abs(np.diff(positions, axis=-1, prepend=0.0))[..., :-1]
+    trades = np.where(columns < last[..., None], trades, 0.0)
+    strategy = held * market + np.log1p(-fee) * trades
+    return strategy, market
+
+
+def hit_rate(
+    prices: np.ndarray, positions: np.ndarray, horizon: int = 10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Share of buys followed by a rise and sells followed by a fall.
+
+    Returns the hit rate and number of trades per row, the rate is NaN for
+    rows without trades.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_prices = np.log(prices)
+        forward = np.full(prices.shape, np.nan)
+        forward[..., :-horizon] = log_prices[..., horizon:] - log_prices[..., :-horizon]
+        change = np.diff(positions, axis=-1, prepend=0.0)
+        trades = (change != 0) & ~np.isnan(forward)
+        hits = trades & (np.sign(forward) == np.sign(change))
+        count = trades.sum(axis=-1)
+        return hits.sum(axis=-1) / count, count
+
+
+def max_drawdown(log_returns: np.ndarray) -> np.ndarray:
+    """Largest peak to trough loss of the equity curve along the last axis."""
+    equity = np.cumsum(log_returns, axis=-1)
+    equity = np.concatenate([np.zeros(equity.shape[:-1] + (1,)), equity], axis=-1)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return 1.0 - np.exp((equity - peak).min(axis=-1))
+
+
+def window_metrics(
+    prices: np.ndarray,
+    strategy: np.ndarray,
+    market: np.ndarray,
+    window: int,
+    stride: int,
+) -> Dict[str, np.ndarray]:
+    """Return, buy and hold return and drawdown for every window of every row.
+
+    "valid" marks the windows that lie entirely within a row's price history.
+    """
+    if strategy.shape[-1] < window:
+        empty = np.empty(strategy.shape[:-1] + (0,))
+        return {
+            "return": empty,
+            "buy_hold": empty,
+            "drawdown": empty,
+            "valid": empty.astype(bool),
+        }
+    known = ~np.isnan(prices[..., :-1]) & ~np.isnan(prices[..., 1:])
+    strategy_windows = sliding_window_view(strategy, window, axis=-1)[..., ::stride, :]
+    market_windows = sliding_window_view(market, window, axis=-1)[..., ::stride, :]
+    known_windows = sliding_window_view(known, window, axis=-1)[..., ::stride, :]
+    return {
+        "return": np.expm1(strategy_windows.sum(axis=-1)),
+        "buy_hold": np.expm1(market_windows.sum(axis=-1)),
+        "drawdown": max_drawdown(strategy_windows),
+        "valid": known_windows.all(axis=-1),
+    }
+
+
+def run_backtest(
+    tokens: List[str],
+    series: Sequence[Tuple[np.ndarray, np.ndarray]],
+    signals: np.ndarray = None,
+    window: int = 1000,
+    stride: int = 100,
+    fee: float = 0.003,
+    horizon: int = 10,
+) -> Dict[str, dict]:
+    """Backtest every token at once, with the indicator rules unless signals are given.
+
+    Each token is tested on its own price points, signals have to be laid
+    out like stack_series.
+    """
+    _, prices = stack_series(series)
+    if signals is None:
+        signals = rule_signals(prices)
+    positions = positions_from_signals(signals)
+    strategy, market = strategy_returns(prices, positions, fee)
+    hits, trades = hit_rate(prices, positions, horizon)
+    windows = window_metrics(prices, strategy, market, window, stride)
+    total = np.expm1(strategy.sum(axis=-1))
+    buy_hold = np.expm1(market.sum(axis=-1))
+    drawdown = max_drawdown(strategy)
+
+    results = {}
+    for row, token in enumerate(tokens):
+        valid = windows["valid"][row]
+        window_returns = windows["return"][row][valid]
+        results[token] = {
+            "blocks": int(np.count_nonzero(~np.isnan(prices[row]))),
+            "return": float(total[row]),
+            "buy_hold_return": float(buy_hold[row]),
+            "max_drawdown": float(drawdown[row]),
+            "trades": int(trades[row]),
+            "hit_rate": None if np.isnan(hits[row]) else float(hits[row]),
+            "windows": len(window_returns),
+            "window_mean_return": (
+                float(window_returns.mean()) if len(window_returns) else None
+            ),
+            "window_beat_buy_hold": (
+                float((window_returns > windows["buy_hold"][row][valid]).mean())
+                if len(window_returns)
+                else None
+            ),
+            "window_mean_drawdown": (
+                float(windows["drawdown"][row][valid].mean())
+                if len(window_returns)
+                else None
+            ),
+        }
+    return results
+
+
+def format_backtest_table(results: Dict[str, dict]) -> str:
+    rows = [
+        "| Token | Blocks | Return | Buy & Hold | Max Drawdown | Trades | Hit Rate | Windows Beating Buy & Hold |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+
+    def percent(value):
+        return "n/a" if value is None else f"{value * 100:.1f}%"
+
+    for token, result in results.items():
+        rows.append(
+            f"| {token} | {result['blocks']} | {percent(result['return'])} "
+            f"| {percent(result['buy_hold_return'])} | {percent(result['max_drawdown'])} "
+            f"| {result['trades']} | {percent(result['hit_rate'])} "
+            f"| {percent(result['window_beat_buy_hold'])} |"
+        )
+    return "\n".join(rows)
+
+
+def get_decisions_path() -> str:
+    return os.getenv("ALEX_DECISIONS_LOG", "./cache/trading_decisions.jsonl")
+
+
+def parse_decision(output: str) -> str:
+    """Buy, Sell or Hold from the last "Recommendation:" line, else "unparsed".
+
+    The strategy task asks for that line, free text is not guessed at since
+    "buy or sell" often comes up in the reasoning for a Hold.
+    """
+    matches = RECOMMENDATION_PATTERN.findall(output or "")
+    return matches[-1].capitalize() if matches else UNPARSED_DECISION
+
+
+def record_decision(
+    symbol: str, token_address: str, block_height: int, decision: str, path: str = None
+):
+    """Append a crew decision so it can be replayed by the backtester."""
+    path = path or get_decisions_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(
+            json.dumps(
+                {
+                    "symbol": symbol,
+                    "token_address": token_address,
+                    "block_height": block_height,
+                    "decision": decision,
+                }
+            )
+            + "\n"
+        )
+
+
+def load_decisions(path: str = None) -> List[dict]:
+    path = path or get_decisions_path()
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,175 @@
+// Long-lived Bun worker used by BunScriptRunner (see utils/scripts.py).
+//
+// Runs agent-tools-ts scripts in-process so Bun startup, TypeScript
+// transpile and the shared module graph (@stacks/transactions etc.) are
+// paid once per worker instead of once per tool call.
+//
+// Protocol: line-delimited JSON over stdin/stdout, one request at a time.
+//   request:  {"id": 1, "script": "src/stacks-bns/get-address-by-bns.ts", "args": ["name.btc"]}
+//   response: {"id": 1, "output": "...", "error": null, "success": true}
+//
+// The agent-tools-ts scripts are written as CLIs (read process.argv, call an
+// un-awaited main(), print with console.log), so a run is considered finished
+// when the module has loaded, no fetch calls are in flight and nothing has
+// been written for SETTLE_MS, or as soon as the script calls process.exit().
+// That only holds for scripts whose work is their fetch calls, so
+// BunScriptRunner.pooled_scripts lists the read-only lookups sent here and
+// every other script (signing, timers, sockets) runs in its own process.
+//
+// Each run imports a fresh copy of the script module, the Python pool
+// replaces a worker after AIBTC_BUN_WORKER_MAX_RUNS runs to bound memory.
+
+import { resolve } from "path";
+import { createInterface } from "readline";
+
+const SETTLE_MS = Number(process.env.AIBTC_BUN_WORKER_SETTLE_MS ?? 50);
+
+const writeProtocol = process.stdout.write.bind(process.stdout);
+const originalExit = process.exit.bind(process);
+const originalFetch = globalThis.fetch;
+const originalConsole = { ...console };
+
+class ScriptExit extends Error {
+  constructor(public code: number) {
+    super(`process.exit(${code})`);
+  }
+}
+
+type Run = {
+  stdout: string[];
+  stderr: string[];
+  failed: boolean;
+  exited: boolean;
+  lastActivity: number;
+};
+
+let current: Run | null = null;
+let inflight = 0;
+let counter = 0;
+
+function format(args: unknown[]): string {
+  return args
+    .map((a) => (typeof a === "string" ? a : Bun.inspect(a)))
+    .join(" ");
+}
+
+function capture(stream: "stdout" | "stderr") {
+  return (...args: unknown[]) => {
+    if (!current) return;
+    current[stream].push(format(args) + "\n");
+    current.lastActivity = Date.now();
+  };
+}
+
+// route everything a script prints into the current run, never the protocol
+console.log = capture("stdout");
+console.info = capture("stdout");
+console.debug = capture("stdout");
+console.warn = capture("stderr");
+console.error = capture("stderr");
+process.stdout.write = ((chunk: any) => {
+  if (current) {
+    current.stdout.push(String(chunk));
+    current.lastActivity = Date.now();
+  }
+  return true;
+}) as typeof process.stdout.write;
+
+process.exit = ((code?: number) => {
+  throw new ScriptExit(code ?? 0);
+}) as typeof process.exit;
+
+globalThis.fetch = (async (...args: Parameters<typeof fetch>) => {
+  inflight++;
+  try {
+    return await originalFetch(...args);
+  } finally {
+    inflight--;
+    if (current) current.lastActivity = Date.now();
+  }
+}) as typeof fetch;
+
+function handleFailure(err: unknown) {
+  if (!current) {
+    originalConsole.error(err);
+    return;
+  }
+  if (err instanceof ScriptExit) {
+    current.exited = true;
+    current.failed = err.code !== 0;
+    return;
+  }
+  current.failed = true;
+  current.stderr.push(
+    (err instanceof Error ? err.stack ?? err.message : String(err)) + "\n"
+  );
+  current.lastActivity = Date.now();
+}
+
+// un-awaited main() promises surface here instead of killing the worker
+process.on("unhandledRejection", handleFailure);
+process.on("uncaughtException", handleFailure);
+
+async function waitForSettle(run: Run) {
+  while (!run.exited) {
+    await Bun.sleep(5);
+    if (inflight === 0 && Date.now() - run.lastActivity >= SETTLE_MS) return;
+  }
+}
+
+async function runScript(script: string, args: string[]) {
+  const run: Run = {
+    stdout: [],
+    stderr: [],
+    failed: false,
+    exited: false,
+    lastActivity: Date.now(),
+  };
+  current = run;
+  const path = resolve(process.cwd(), script);
+  process.argv = [process.argv[0], path, ...args];
+  try {
+    // the query string forces the script body to re-evaluate on every call
+    // while its dependencies stay cached in the module registry
+    await import(`${path}?run=${++counter}`);
+  } catch (err) {
+    handleFailure(err);
+  }
+  await waitForSettle(run);
+  current = null;
+  return run;
+}
+
+const rl = createInterface({ input: process.stdin });
+let queue: Promise<void> = Promise.resolve();
+
+rl.on("line", (line) => {
+  if (!line.trim()) return;
+  queue = queue.then(async () => {
+    let id: unknown = null;
+    try {
+      const request = JSON.parse(line);
+      id = request.id;
+      const run = await runScript(request.script, request.args ?? []);
+      const output = run.stdout.join("");
+      const error = run.stderr.join("");
+      writeProtocol(
+        JSON.stringify({
+          id,
+          output: run.failed ? null : output,
+          error: run.failed ? error : null,
+          success: !run.failed,
+        }) + "\n"
+      );
+    } catch (err) {
+      writeProtocol(
+        JSON.stringify({ id, output: null, error: String(err), success: false }) +
+          "\n"
+      );
+    }
+  });
+});
+
+rl.on("close", () => originalExit(0));
+
+writeProtocol(JSON.stringify({ ready: true }) + "\n");
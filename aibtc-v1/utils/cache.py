@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+
+
+# in-memory LRU cache with per-entry expiry and an optional sqlite backing file
+class TTLCache:
+    def __init__(self, max_entries: int = 256, path: str = None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)"
+            )
+            self.db.commit()
+
+    def get(self, key: str, default=None):
+        """Return a cached value, or default if it is missing or expired."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                entry = self._load(key)
+            if entry is not None and entry[0] > now:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                self._evict()
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._delete(key)
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value, ttl: float):
+        """Store a JSON-serializable value for ttl seconds."""
+        entry = (time.time() + ttl, value)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self._evict()
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), entry[0], time.time()),
+                )
+                # keep the backing file to the same bound, oldest use first
+                self.db.execute(
+                    "DELETE FROM cache WHERE key NOT IN "
+                    "(SELECT key FROM cache ORDER BY used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM cache")
+                self.db.commit()
+
+    def stats(self) -> dict:
+        """Counters for monitoring cache effectiveness."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+            }
+
+    def _load(self, key: str):
+        row = self.db.execute(
+            "SELECT expires_at, value FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.db.execute(
+            "UPDATE cache SET used_at = ? WHERE key = ?", (time.time(), key)
+        )
+        self.db.commit()
+        return row[0], json.loads(row[1])
+
+    def _delete(self, key: str):
+        self.entries.pop(key, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.db.commit()
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+# embeddings in a sqlite file keyed by model and text hash, stored as float32
+# and evicted least recently used first once over max_entries
+class EmbeddingCache:
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or os.getenv(
+            "AIBTC_EMBEDDING_CACHE_PATH", "./cache/embeddings.db"
+        )
+        self.max_entries = max_entries or int(
+            os.getenv("AIBTC_EMBEDDING_CACHE_SIZE", "100000")
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT, text_hash TEXT, vector BLOB, used_at REAL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS embeddings_by_use ON embeddings (used_at);
+            """
+        )
+        self.db.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[list]]:
+        """Cached vectors in the order of texts, None where there is none."""
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        with self.lock:
+            unique = list(dict.fromkeys(hashes))
+            # stay below the sqlite limit on query parameters
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                marks = ", ".join("?" for _ in batch)
+                found.update(
+                    self.db.execute(
+                        "SELECT text_hash, vector FROM embeddings "
+                        f"WHERE model = ? AND text_hash IN ({marks})",
+                        (model, *batch),
+                    ).fetchall()
+                )
+            if found:
+                now = time.time()
+                self.db.executemany(
+                    "UPDATE embeddings SET used_at = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found],
+                )
+                self.db.commit()
+            hits = sum(text_hash in found for text_hash in hashes)
+            self.hits += hits
+            self.misses += len(hashes) - hits
+        return [
+            (
+                np.frombuffer(found[text_hash], dtype=np.float32).tolist()
+                if text_hash in found
+                else None
+            )
+            for text_hash in hashes
+        ]
+
+    def set_many(self, model: str, texts: List[str], vectors: List[list]):
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), np.asarray(vector, np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows
+            )
+            excess = (
+                self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                - self.max_entries
+            )
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM embeddings WHERE (model, text_hash) IN "
+                    "(SELECT model, text_hash FROM embeddings ORDER BY used_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self.db.commit()
+
+    def stats(self) -> dict:
+        """Counters for monitoring cache effectiveness."""
+        with self.lock:
+            total = self.hits + self.misses
+            size = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "size": size,
+            }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+embedding_cache: Optional[EmbeddingCache] = None
+embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the shared embedding cache, creating it on first use."""
+    global embedding_cache
+    with embedding_cache_lock:
+        if embedding_cache is None:
+            embedding_cache = EmbeddingCache()
+        return embedding_cache
@@ -0,0 +1,302 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
+
+FUNCTION_KINDS = {
+    "define-public": "public",
+    "define-private": "private",
+    "define-read-only": "read-only",
+}
+
+DATA_WRITES = {"var-set", "map-set", "map-insert", "map-delete"}
+
+ASSET_WRITES = {
+    "stx-transfer?",
+    "stx-transfer-memo?",
+    "stx-burn?",
+    "ft-mint?",
+    "ft-transfer?",
+    "ft-burn?",
+    "nft-mint?",
+    "nft-transfer?",
+    "nft-burn?",
+}
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<whitespace>[\s,]+)
+    | (?P<comment>;[^\n]*)
+    | (?P<open>[({])
+    | (?P<close>[)}])
+    | (?P<string>u?"(?:[^"\\]|\\.)*")
+    | (?P<atom>[^\s(){},;"]+)
+    """,
+    re.VERBOSE,
+)
+
+
+class ClarityParseError(Exception):
+    pass
+
+
+@dataclass
+class Node:
+    kind: str  # list, tuple, atom or string
+    value: Union[str, List["Node"]]
+    start: int
+    end: int
+
+    def head(self) -> Optional[str]:
+        """Name of the first atom in a list, e.g. define-public."""
+        if self.kind == "list" and self.value and self.value[0].kind == "atom":
+            return self.value[0].value
+        return None
+
+    def walk(self):
+        """Yield this node and every node below it."""
+        yield self
+        if self.kind in ("list", "tuple"):
+            for child in self.value:
+                yield from child.walk()
+
+
+@dataclass
+class ClarityFunction:
+    name: str
+    kind: str  # public, private or read-only
+    signature: str
+    args: List[tuple] = field(default_factory=list)  # (name, type)
+    trait_args: List[str] = field(default_factory=list)
+    uses_as_contract: bool = False
+    as_contract_calls: bool = False
+    contract_calls: bool = False
+    writes: List[str] = field(default_factory=list)
+    calls: List[str] = field(default_factory=list)
+    references: List[str] = field(default_factory=list)
+    source: str = ""
+
+    def suggested_category(self) -> str:
+        """Mechanical risk hint, the analysis tasks make the final call."""
+        if (
+            self.as_contract_calls
+            or self.trait_args
+            or any(write in ASSET_WRITES for write in self.writes)
+        ):
+            return "RED"
+        if self.contract_calls or self.uses_as_contract:
+            return "ORANGE"
+        if self.writes:
+            return "YELLOW"
+        return "GREEN"
+
+
+def tokenize(source: str) -> list:
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if not match:
+            raise ClarityParseError(f"Unexpected character at offset {position}")
+        kind = match.lastgroup
+        if kind not in ("whitespace", "comment"):
+            tokens.append((kind, match.group(), match.start(), match.end()))
+        position = match.end()
+    return tokens
+
+
+def parse_clarity(source: str) -> List[Node]:
+    """Parse Clarity source into a list of top-level S-expression nodes."""
+    stack = [[]]
+    openers = []
+    for kind, text, start, end in tokenize(source):
+        if kind == "open":
+            stack.append([])
+            openers.append((text, start))
+        elif kind == "close":
+            if not openers:
+                raise ClarityParseError(f"Unbalanced '{text}' at offset {start}")
+            opener, opener_start = openers.pop()
+            if (opener, text) not in (("(", ")"), ("{", "}")):
+                raise ClarityParseError(f"Mismatched '{text}' at offset {start}")
+            children = stack.pop()
+            node_kind = "list" if opener == "(" else "tuple"
+            stack[-1].append(Node(node_kind, children, opener_start, end))
+        else:
+            stack[-1].append(Node(kind, text, start, end))
+    if openers:
+        raise ClarityParseError(f"Unclosed '{openers[-1][0]}' at {openers[-1][1]}")
+    return stack[0]
+
+
+def parse_arguments(node: Node, source: str) -> List[tuple]:
+    args = []
+    for arg in node.value[1:]:
+        if arg.kind == "list" and len(arg.value) == 2 and arg.value[0].kind == "atom":
+            arg_type = arg.value[1]
+            args.append((arg.value[0].value, source[arg_type.start : arg_type.end]))
+    return args
+
+
+def extract_functions(source: str) -> List[ClarityFunction]:
+    """Extract every public, private and read-only function with its usage facts."""
+    functions = []
+    for node in parse_clarity(source):
+        kind = FUNCTION_KINDS.get(node.head())
+        if not kind or len(node.value) < 2 or node.value[1].kind != "list":
+            continue
+        header = node.value[1]
+        if not header.value or header.value[0].kind != "atom":
+            continue
+        args = parse_arguments(header, source)
+        function = ClarityFunction(
+            name=header.value[0].value,
+            kind=kind,
+            signature=f"({node.head()} {source[header.start : header.end]})",
+            args=args,
+            trait_args=[
+                name for name, arg_type in args if re.fullmatch(r"<[^<>]+>", arg_type)
+            ],
+            source=source[node.start : node.end],
+        )
+        calls, references, writes = set(), set(), set()
+        for body in node.value[2:]:
+            for child in body.walk():
+                head = child.head()
+                if head:
+                    calls.add(head)
+                    if head in DATA_WRITES or head in ASSET_WRITES:
+                        writes.add(head)
+                    if head == "contract-call?":
+                        function.contract_calls = True
+                    if head == "as-contract":
+                        function.uses_as_contract = True
+                        if any(n.head() == "contract-call?" for n in child.walk()):
+                            function.as_contract_calls = True
+                elif child.kind == "atom":
+                    references.add(child.value)
+        function.calls = sorted(calls)
+        function.references = sorted(references)
+        function.writes = sorted(writes)
+        functions.append(function)
+    return functions
+
+
+def format_function_list(functions: List[ClarityFunction]) -> str:
+    """Markdown list of function signatures, used in task descriptions."""
+    if not functions:
+        return "- (none)"
+    return "\n".join(f"- `{function.signature}`" for function in functions)
+
+
+def format_function_inventory(functions: List[ClarityFunction]) -> str:
+    """Markdown table of every function and the facts found by the parser."""
+    rows = [
+        "| Function | Kind | Trait Args | as-contract + contract-call? | Writes | Suggested |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for function in functions:
+        rows.append(
+            f"| `{function.name}` | {function.kind} "
+            f"| {', '.join(function.trait_args) or '-'} "
+            f"| {'yes' if function.as_contract_calls else '-'} "
+            f"| {', '.join(function.writes) or '-'} "
+            f"| {function.suggested_category()} |"
+        )
+    return "\n".join(rows)
+
+
+def definition_name(node: Node) -> Optional[str]:
+    """Name introduced by a top-level define-* or use-trait form."""
+    head = node.head()
+    if not head or not (head.startswith("define-") or head == "use-trait"):
+        return None
+    if len(node.value) < 2:
+        return None
+    target = node.value[1]
+    if target.kind == "list" and target.value and target.value[0].kind == "atom":
+        return target.value[0].value  # function header
+    if target.kind == "atom":
+        return target.value
+    return None
+
+
+def collect_definitions(nodes: List[Node]) -> Dict[str, Node]:
+    definitions: Dict[str, Node] = {}
+    for node in nodes:
+        name = definition_name(node)
+        if name:
+            definitions[name] = node
+    return definitions
+
+
+def collect_dependencies(
+    definitions: Dict[str, Node], function_names: Iterable[str]
+) -> set:
+    """Names of the given definitions plus everything they reference, transitively."""
+    included = set()
+    pending = [name for name in function_names if name in definitions]
+    while pending:
+        name = pending.pop()
+        if name in included:
+            continue
+        included.add(name)
+        for child in definitions[name].walk():
+            if child.kind != "atom":
+                continue
+            # trait types are referenced as <trait-name>
+            reference = child.value.strip("<>")
+            if reference in definitions and reference not in included:
+                pending.append(reference)
+    return included
+
+
+def slice_contract(source: str, function_names: Iterable[str]) -> str:
+    """Source of the given functions plus their callees, constants and data definitions."""
+    nodes = parse_clarity(source)
+    included = collect_dependencies(collect_definitions(nodes), function_names)
+    if not included:
+        raise ClarityParseError("None of the requested functions are defined")
+
+    # keep original order, impl-trait is always relevant context
+    return "\n\n".join(
+        source[node.start : node.end]
+        for node in nodes
+        if definition_name(node) in included or node.head() == "impl-trait"
+    )
+
+
+def slice_contract_or_full(source: str, function_names: Iterable[str]) -> str:
+    """slice_contract with a fallback to the full source when slicing fails."""
+    try:
+        return slice_contract(source, function_names)
+    except ClarityParseError:
+        return source
+
+
+def normalize_source(source: str) -> str:
+    """Source with comments dropped and whitespace collapsed between tokens."""
+    return " ".join(text for _, text, _, _ in tokenize(source))
+
+
+def function_fingerprints(source: str) -> Dict[str, str]:
+    """Map each function name to a hash of its normalized body and dependencies.
+
+    A fingerprint changes when the function or anything it calls or reads
+    (private functions, constants, data vars, maps, traits) changes.
+    """
+    nodes = parse_clarity(source)
+    definitions = collect_definitions(nodes)
+    normalized = {
+        name: normalize_source(source[node.start : node.end])
+        for name, node in definitions.items()
+    }
+    fingerprints = {}
+    for function in extract_functions(source):
+        dependencies = collect_dependencies(definitions, [function.name])
+        digest = hashlib.sha256()
+        for name in sorted(dependencies):
+            digest.update(normalized[name].encode("utf-8"))
+            digest.update(b"\0")
+        fingerprints[function.name] = digest.hexdigest()
+    return fingerprints
@@ -0,0 +1,242 @@
+import os
+import re
+import threading
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional
+from utils.clarity import clarityFunctions, clarityHints, clarityKeywords
+from utils.vector import AIBTCEmbeddings
+from utils.vector_index import normalize
+
+ENTRY_PATTERN = re.compile(
+    r"^#### (?P<title>.+?)\n(?P<body>.*?)(?=^#### |\Z)", re.M | re.S
+)
+
+# fields run together on one line in parts of the docs, e.g. "Clarity 1output:"
+FIELD_PATTERN = re.compile(
+    r"(Introduced in|(?<![A-Za-z_-])input|(?<![A-Za-z_-])output"
+    r"|(?<![A-Za-z_-])signature|(?<![A-Za-z_-])description):[ \t]*"
+)
+
+NAME_PATTERN = r"([^\s`'\"(),;:.{}]+)"
+
+EXAMPLE_PATTERN = re.compile(r"\nexample:\s*```\w*\n(?P<example>.*?)```", re.S)
+
+
+@dataclass
+class ClarityReferenceEntry:
+    name: str
+    kind: str  # keyword or function
+    title: str = ""
+    signature: str = ""
+    introduced_in: str = ""
+    input: str = ""
+    output: str = ""
+    description: str = ""
+    example: str = ""
+
+    def search_text(self) -> str:
+        """Text embedded for retrieval, the example is left out as mostly noise."""
+        return f"Clarity {self.kind} {self.title}\n{self.signature}\n{self.description}"
+
+    def to_markdown(self) -> str:
+        lines = [f"#### {self.title}"]
+        if self.introduced_in:
+            lines.append(f"Introduced in: {self.introduced_in}")
+        if self.input:
+            lines.append(f"input: {self.input}")
+        if self.output:
+            lines.append(f"output: {self.output}")
+        if self.signature:
+            lines.append(f"signature: {self.signature}")
+        lines.append(f"description: {self.description}")
+        if self.example:
+            lines.append(f"example:\n```clarity\n{self.example}\n```")
+        return "\n".join(lines)
+
+    def to_summary(self) -> str:
+        """One line with the signature and the first sentence of the description."""
+        usage = self.signature or f"`{self.name}`"
+        output = f" -> {self.output}" if self.output else ""
+        summary = re.split(r"(?<=\.)\s", self.description, maxsplit=1)[0]
+        return f"- {usage}{output}: {summary}"
+
+
+@dataclass
+class ClarityHint:
+    text: str
+    names: List[str]  # keywords and functions the hint is about, if any
+
+    def applies_to(self, entries: List[ClarityReferenceEntry]) -> bool:
+        """General hints always apply, the others only with one of their names."""
+        return not self.names or any(entry.name in self.names for entry in entries)
+
+
+def parse_clarity_reference(text: str, kind: str) -> List[ClarityReferenceEntry]:
+    """Split the markdown reference in utils/clarity.py into one entry per name."""
+    entries = []
+    for match in ENTRY_PATTERN.finditer(text):
+        title = match.group("title").replace("\\", "").strip()
+        body = match.group("body")
+        example = EXAMPLE_PATTERN.search(body)
+        if example:
+            body = body[: example.start()]
+        fields = {}
+        parts = FIELD_PATTERN.split(body)
+        for label, value in zip(parts[1::2], parts[2::2]):
+            fields[label.lower().replace(" ", "_")] = value.strip()
+        entries.append(
+            ClarityReferenceEntry(
+                name=title.split(" (")[0],
+                kind=kind,
+                title=title,
+                signature=fields.get("signature", ""),
+                introduced_in=fields.get("introduced_in", ""),
+                input=fields.get("input", ""),
+                output=fields.get("output", ""),
+                description=fields.get("description", ""),
+                example=example.group("example").strip() if example else "",
+            )
+        )
+    return entries
+
+
+def parse_clarity_hints(
+    text: str, entries: List[ClarityReferenceEntry]
+) -> List[ClarityHint]:
+    """One hint per bullet, tied to the reference entries it names in backticks."""
+    known = {entry.name for entry in entries}
+    return [
+        ClarityHint(
+            text=line[2:].strip(),
+            names=[name for name in re.findall(r"`([^`]+)`", line) if name in known],
+        )
+        for line in text.splitlines()
+        if line.startswith("- ")
+    ]
+
+
+class ClarityReferenceIndex:
+    """Keywords and functions ranked by embedding similarity to a requirement."""
+
+    def __init__(
+        self,
+        entries: List[ClarityReferenceEntry],
+        hints: List[ClarityHint] = None,
+        embedder=None,
+    ):
+        self.entries = entries
+        self.hints = hints or []
+        self.embedder = embedder or AIBTCEmbeddings()
+        self.vectors = None
+        self.embed_entries()
+
+    def embed_entries(self) -> bool:
+        """Embed the entries if they aren't yet, False if the embedder fails.
+
+        One batched request the first time, then served by the embedding
+        cache. Until it succeeds searches only return the named entries.
+        """
+        if self.vectors is None:
+            try:
+                self.vectors = normalize(
+                    np.asarray(
+                        self.embedder.embed_documents(
+                            [entry.search_text() for entry in self.entries]
+                        ),
+                        dtype=np.float32,
+                    )
+                )
+            except Exception as e:
+                print(f"Clarity reference embedding failed, matching names only: {e}")
+        return self.vectors is not None
+
+    def mentioned(self, text: str) -> List[ClarityReferenceEntry]:
+        """Entries named literally in the text, e.g. `map-set` or (ft-mint? ...).
+
+        Plain words like "if" or "list" only count in backticks or after a
+        paren, otherwise every requirement in english would match them.
+        """
+        text = text.lower()
+        words = set(re.findall(NAME_PATTERN, text))
+        quoted = set(re.findall(r"[`(]" + NAME_PATTERN, text))
+        return [
+            entry
+            for entry in self.entries
+            if entry.name in quoted
+            or (
+                entry.name in words
+                and not entry.name.isalpha()
+                and re.search("[a-z]", entry.name)
+            )
+        ]
+
+    def search(self, text: str, top_n: int = None) -> List[ClarityReferenceEntry]:
+        """Entries named in the text first, then the closest by meaning.
+
+        If the embedder fails only the named entries are returned.
+        """
+        top_n = top_n or int(os.getenv("AIBTC_CLARITY_REFERENCE_TOP_N", "12"))
+        results = self.mentioned(text)[:top_n]
+        if len(results) < top_n and self.embed_entries():
+            try:
+                query = normalize(
+                    np.asarray(self.embedder.embed_query(text), dtype=np.float32)
+                )
+            except Exception as e:
+                print(f"Clarity reference embedding failed, matching names only: {e}")
+                return results
+            for row in np.argsort(-(self.vectors @ query), kind="stable"):
+                if len(results) >= top_n:
+                    break
+                if self.entries[row] not in results:
+                    results.append(self.entries[row])
+        return results
+
+    def relevant_hints(self, entries: List[ClarityReferenceEntry]) -> List[ClarityHint]:
+        return [hint for hint in self.hints if hint.applies_to(entries)]
+
+
+clarity_reference_index: Optional[ClarityReferenceIndex] = None
+clarity_reference_lock = threading.Lock()
+
+
+def get_clarity_reference() -> List[ClarityReferenceEntry]:
+    return parse_clarity_reference(
+        clarityKeywords, "keyword"
+    ) + parse_clarity_reference(clarityFunctions, "function")
+
+
+def get_clarity_reference_index() -> ClarityReferenceIndex:
+    """Return the shared reference index, embedding the entries on first use."""
+    global clarity_reference_index
+    with clarity_reference_lock:
+        if clarity_reference_index is None:
+            entries = get_clarity_reference()
+            clarity_reference_index = ClarityReferenceIndex(
+                entries, parse_clarity_hints(clarityHints, entries)
+            )
+        return clarity_reference_index
+
+
+def format_clarity_reference(text: str, top_n: int = None, brief: bool = False) -> str:
+    """Markdown reference of the keywords and functions relevant to the text.
+
+    brief keeps one line per entry for prompts, the full entries with
+    examples are for the reference lookup tool.
+    """
+    entries = get_clarity_reference_index().search(text, top_n)
+    if brief:
+        return "### Relevant Clarity Reference\n" + "\n".join(
+            entry.to_summary() for entry in entries
+        )
+    return "### Relevant Clarity Reference\n\n" + "\n\n".join(
+        entry.to_markdown() for entry in entries
+    )
+
+
+def format_clarity_hints(text: str, top_n: int = None) -> str:
+    """The general Clarity hints and those about the entries relevant to the text."""
+    index = get_clarity_reference_index()
+    hints = index.relevant_hints(index.search(text, top_n))
+    return "### Clarity Hints\n" + "\n".join(f"- {hint.text}" for hint in hints)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Optional
+from utils.scripts import BunScriptRunner
+
+CONTRACT_IDENTIFIER = re.compile(r"^S[0-9A-Z]{27,40}\.[a-zA-Z][a-zA-Z0-9_-]{0,127}$")
+
+
+# deployed contracts are immutable, so sources are stored without expiry
+# objects/<sha256>.clar holds each unique source once and
+# refs/<ADDRESS.CONTRACT_NAME> points at the hash of its source
+class ContractSourceStore:
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("AIBTC_CONTRACT_CACHE_DIR", "./cache/contracts")
+        self.objects_dir = os.path.join(self.path, "objects")
+        self.refs_dir = os.path.join(self.path, "refs")
+
+    def get(self, contract_identifier: str) -> Optional[str]:
+        """Return the stored source for a contract, or None if not stored."""
+        if not is_contract_identifier(contract_identifier):
+            return None
+        try:
+            with open(os.path.join(self.refs_dir, contract_identifier)) as f:
+                source_hash = f.read().strip()
+            with open(os.path.join(self.objects_dir, f"{source_hash}.clar")) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, contract_identifier: str, source: str) -> str:
+        """Store the source for a contract and return its sha256 hash."""
+        source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        if not is_contract_identifier(contract_identifier):
+            return source_hash
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        object_path = os.path.join(self.objects_dir, f"{source_hash}.clar")
+        if not os.path.exists(object_path):
+            write_atomic(object_path, source)
+        write_atomic(os.path.join(self.refs_dir, contract_identifier), source_hash)
+        return source_hash
+
+
+def is_contract_identifier(contract_identifier: str) -> bool:
+    return bool(CONTRACT_IDENTIFIER.match(contract_identifier or ""))
+
+
+def write_atomic(path: str, content: str):
+    # write to a temp file first so readers never see a partial file, a
+    # unique name per call keeps concurrent writers of one path apart
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def extract_contract_source(output: str) -> Optional[str]:
+    """Pull the Clarity source out of get-contract-source-code.ts output.
+
+    Returns None unless the output is a json payload with a source, so error
+    text printed by the script is never taken for a contract.
+    """
+    try:
+        data = json.loads(output)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(data, dict):
+        # api errors come back as json without a source field
+        source = data.get("source")
+    else:
+        source = data
+    return source if isinstance(source, str) and source.strip() else None
+
+
+def fetch_contract_source(contract_identifier: str) -> dict:
+    """Get contract source from the local store, or fetch and store it."""
+    contract_identifier = contract_identifier.strip()
+    store = ContractSourceStore()
+    source = store.get(contract_identifier)
+    if source is not None:
+        return {"output": source, "error": None, "success": True}
+
+    result = BunScriptRunner.bun_run(
+        "stacks-contracts", "get-contract-source-code.ts", contract_identifier
+    )
+    if not result["success"]:
+        return result
+    source = extract_contract_source(result["output"])
+    if source is None:
+        return {
+            "output": result["output"],
+            "error": f"No contract source found for {contract_identifier}",
+            "success": False,
+        }
+    store.put(contract_identifier, source)
+    return {"output": source, "error": None, "success": True}
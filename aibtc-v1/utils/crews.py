@@ -1,6 +1,10 @@
+import os
 import streamlit as st
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from crewai import Agent, Task, Crew, Process
-from typing import List
+from crewai.crews.crew_output import CrewOutput
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Dict, List
 from utils.callbacks import crew_step_callback, crew_task_callback
 
 
@@ -18,22 +22,116 @@ class AIBTC_Crew:
     def add_task(self, task: Task):
         self.tasks.append(task)
 
-    def create_crew(self) -> Crew:
+    def create_crew(self, memory: bool = True) -> Crew:
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-            memory=True,
+            memory=memory,
             embedder=self.embedder,
             step_callback=crew_step_callback,
             task_callback=crew_task_callback,
         )
 
+    def kickoff(self) -> CrewOutput:
+        """Run the crew the way it is meant to run, as a sequential crew by default."""
+        return self.create_crew().kickoff()
+
+    def kickoff_parallel(
+        self,
+        max_workers: int = None,
+        step_callback=crew_step_callback,
+        task_callback=crew_task_callback,
+        memory: bool = True,
+    ) -> CrewOutput:
+        """Run tasks as a DAG built from their context, independent tasks concurrently.
+
+        The tasks run outside Crew.kickoff, but each agent copy is attached to
+        a crew from create_crew so memory and the embedder work as they do
+        in a sequential run.
+        """
+        max_workers = max_workers or int(os.getenv("AIBTC_MAX_PARALLEL_TASKS", "4"))
+        crew = self.create_crew(memory=memory)
+        dependencies = get_task_dependencies(self.tasks)
+        outputs = {}
+        used_agents = []
+        # worker threads need the streamlit context to update session state
+        script_run_ctx = get_script_run_ctx()
+
+        def run_task(index: int):
+            if script_run_ctx:
+                add_script_run_ctx(ctx=script_run_ctx)
+            task = self.tasks[index]
+            # concurrent tasks must not share an agent executor
+            agent = task.agent.copy()
+            agent.crew = crew
+            agent.step_callback = step_callback
+            context = "\n\n----------\n\n".join(
+                outputs[dependency].raw for dependency in dependencies[index]
+            )
+            context = self.build_task_context(task, context)
+            return task.execute_sync(agent=agent, context=context), agent
+
+        remaining = set(range(len(self.tasks)))
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while remaining or pending:
+                ready = [
+                    index
+                    for index in sorted(remaining)
+                    if all(dep in outputs for dep in dependencies[index])
+                ]
+                for index in ready:
+                    remaining.remove(index)
+                    pending[executor.submit(run_task, index)] = index
+                if not pending:
+                    raise ValueError("Task context contains a dependency cycle")
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    outputs[index], agent = future.result()
+                    used_agents.append(agent)
+                    if task_callback:
+                        task_callback(outputs[index])
+
+        # usage comes from the agent copies that ran the tasks
+        crew.agents = used_agents
+        token_usage = crew.calculate_usage_metrics()
+
+        # outputs keep the original task order, the last task is the final result
+        tasks_output = [outputs[index] for index in range(len(self.tasks))]
+        return CrewOutput(
+            raw=tasks_output[-1].raw if tasks_output else "",
+            tasks_output=tasks_output,
+            token_usage=token_usage,
+        )
+
+    def build_task_context(self, task: Task, context: str) -> str:
+        """Hook for crews to adjust a task's context in kickoff_parallel."""
+        return context
+
     def render_crew(self):
         pass
 
 
+def get_task_dependencies(tasks: List[Task]) -> Dict[int, List[int]]:
+    """Map each task index to the indexes of the tasks it takes context from."""
+    positions = {id(task): index for index, task in enumerate(tasks)}
+    dependencies = {}
+    for index, task in enumerate(tasks):
+        if isinstance(task.context, list):
+            dependencies[index] = [
+                positions[id(context_task)]
+                for context_task in task.context
+                if id(context_task) in positions
+            ]
+        else:
+            # without explicit context a sequential task sees all prior outputs
+            dependencies[index] = list(range(index))
+    return dependencies
+
+
 def display_token_usage(token_usage):
     st.subheader("Token Usage")
     col1, col2 = st.columns(2)
@@ -0,0 +1,260 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Optional, Sequence, Tuple
+
+# indicators return arrays aligned with the input series, with NaN where
+# there is not enough history yet. sma, rolling_std, ewm, ema, rsi and macd
+# also take 2d arrays (one series per row) and work along the last axis
+
+
+def to_series(values: Sequence[float]) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def sort_by_block(
+    block_heights: Sequence[int], values: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sort a series by block height, oldest first."""
+    block_heights = np.asarray(block_heights, dtype=np.int64)
+    values = to_series(values)
+    order = np.argsort(block_heights, kind="stable")
+    return block_heights[order], values[order]
+
+
+def sma(values: Sequence[float], period: int) -> np.ndarray:
+    """Simple moving average."""
+    values = to_series(values)
+    result = np.full(values.shape, np.nan)
+    if period <= 0 or values.shape[-1] < period:
+        return result
+    cumulative = np.cumsum(values, axis=-1)
+    cumulative = np.concatenate(
+        [np.zeros(values.shape[:-1] + (1,)), cumulative], axis=-1
+    )
+    result[..., period - 1 :] = (
+        cumulative[..., period:] - cumulative[..., :-period]
+    ) / period
+    return result
+
+
+def rolling_std(values: Sequence[float], period: int) -> np.ndarray:
+    """Population standard deviation over a rolling window."""
+    values = to_series(values)
+    result = np.full(values.shape, np.nan)
+    if period <= 0 or values.shape[-1] < period:
+        return result
+    # center first so the sum of squares doesn't lose precision on large prices
+    centered = values - values.mean(axis=-1, keepdims=True)
+    mean = sma(centered, period)[..., period - 1 :]
+    mean_square = sma(centered * centered, period)[..., period - 1 :]
+    result[..., period - 1 :] = np.sqrt(np.maximum(mean_square - mean * mean, 0.0))
+    return result
+
+
+def ewm(values: Sequence[float], alpha: float) -> np.ndarray:
+    """Exponentially weighted mean seeded with the first value.
+
+    Same result as ``y[t] = alpha * x[t] + (1 - alpha) * y[t - 1]``, computed
+    in blocks short enough that the decay weights stay within float range.
+    """
+    values = to_series(values)
+    result = np.empty(values.shape)
+    if values.shape[-1] == 0:
+        return result
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+    block_size = max(1, int(575 / -math.log(decay)))
+    powers = decay ** np.arange(block_size)
+    previous = values[..., :1]
+    for start in range(0, values.shape[-1], block_size):
+        block = values[..., start : start + block_size]
+        count = block.shape[-1]
+        weights = powers[:count]
+        # y[t] = decay^(t+1) * y[-1] + alpha * sum(decay^(t-k) * x[k])
+        scaled = np.cumsum(block / weights, axis=-1) * weights
+        seed = previous * decay * weights
+        if start == 0:
+            # the first value seeds the average instead of being weighted
+            scaled = scaled - block[..., :1] * weights
+            seed = block[..., :1] * weights
+        result[..., start : start + count] = seed + alpha * scaled
+        previous = result[..., start + count - 1 : start + count]
+    return result
+
+
+def ema(values: Sequence[float], period: int) -> np.ndarray:
+    """Exponential moving average with the usual 2 / (period + 1) smoothing."""
+    return ewm(values, 2.0 / (period + 1))
+
+
+def rsi(values: Sequence[float], period: int = 14) -> np.ndarray:
+    """Relative strength index with Wilder's smoothing."""
+    values = to_series(values)
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] <= period:
+        return result
+    change = np.diff(values, axis=-1)
+    average_gain = ewm(np.maximum(change, 0.0), 1.0 / period)
+    average_loss = ewm(np.maximum(-change, 0.0), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    # no losses in the window means maximum strength
+    strength[average_loss == 0.0] = 100.0
+    strength[(average_loss == 0.0) & (average_gain == 0.0)] = 50.0
+    result[..., period:] = strength[..., period - 1 :]
+    return result
+
+
+def macd(
+    values: Sequence[float], fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram."""
+    values = to_series(values)
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    histogram = line - signal_line
+    # the slow average needs a full period before the values mean anything
+    line[..., : slow - 1] = np.nan
+    signal_line[..., : slow + signal - 2] = np.nan
+    histogram[..., : slow + signal - 2] = np.nan
+    return line, signal_line, histogram
+
+
+def pivots(values: Sequence[float], order: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Indexes of local lows and highs, the extreme of a 2 * order + 1 window."""
+    values = to_series(values)
+    size = 2 * order + 1
+    if len(values) < size:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    windows = sliding_window_view(values, size)
+    center = windows[:, order]
+    lows = np.flatnonzero(center == windows.min(axis=1)) + order
+    highs = np.flatnonzero(center == windows.max(axis=1)) + order
+    return lows, highs
+
+
+def support_resistance(
+    values: Sequence[float], lookback: int = 100, order: int = 5
+) -> Tuple[Optional[float], Optional[float]]:
+    """Nearest pivot low below and pivot high above the latest value.
+
+    Falls back to the lookback low and high when no pivot is on that side.
+    """
+    values = to_series(values)[-lookback:]
+    if len(values) == 0:
+        return None, None
+    price = values[-1]
+    lows, highs = pivots(values, order)
+    below = values[lows][values[lows] < price]
+    above = values[highs][values[highs] > price]
+    support = below.max() if len(below) else values.min()
+    resistance = above.min() if len(above) else values.max()
+    return float(support), float(resistance)
+
+
+def latest(series: np.ndarray) -> Optional[float]:
+    if len(series) == 0 or np.isnan(series[-1]):
+        return None
+    return float(series[-1])
+
+
+def compute_signals(
+    price_blocks: Sequence[int],
+    prices: Sequence[float],
+    volume_blocks: Sequence[int] = (),
+    volumes: Sequence[float] = (),
+    volume_period: int = 20,
+) -> Dict[str, Optional[float]]:
+    """Latest value of every indicator the trading analysis uses."""
+    price_blocks, prices = sort_by_block(price_blocks, prices)
+    volume_blocks, volumes = sort_by_block(volume_blocks, volumes)
+
+    signals = {
+        "first_block": int(price_blocks[0]) if len(prices) else None,
+        "last_block": int(price_blocks[-1]) if len(prices) else None,
+        "blocks": len(prices),
+        "price": latest(prices),
+        "ma_50": latest(sma(prices, 50)),
+        "ma_100": latest(sma(prices, 100)),
+        "std_20": latest(rolling_std(prices, 20)),
+        "std_100": latest(rolling_std(prices, 100)),
+        "rsi_14": latest(rsi(prices, 14)),
+    }
+    line, signal_line, histogram = macd(prices)
+    signals["macd"] = latest(line)
+    signals["macd_signal"] = latest(signal_line)
+    signals["macd_histogram"] = latest(histogram)
+    signals["support"], signals["resistance"] = support_resistance(prices)
+
+    # largest single-block move relative to recent volatility
+    if len(prices) > 20:
+        returns = np.diff(prices) / prices[:-1]
+        recent = returns[-20:]
+        spread = recent.std()
+        signals["max_move_z"] = (
+            float(np.abs(recent - recent.mean()).max() / spread) if spread else 0.0
+        )
+    else:
+        signals["max_move_z"] = None
+
+    signals["volume"] = latest(volumes)
+    average_volume = latest(sma(volumes, volume_period))
+    if average_volume and signals["volume"] is not None:
+        signals["volume_ratio"] = signals["volume"] / average_volume
+    else:
+        signals["volume_ratio"] = None
+    return signals
+
+
+def describe_signals(signals: Dict[str, Optional[float]]) -> Dict[str, str]:
+    """Plain readings of the computed values, e.g. bullish crossover."""
+    readings = {}
+    price = signals["price"]
+    if price is not None and signals["ma_50"] is not None:
+        readings["ma_50"] = "price above" if price > signals["ma_50"] else "price below"
+    if signals["ma_50"] is not None and signals["ma_100"] is not None:
+        readings["ma_100"] = (
+            "MA50 above MA100 (uptrend)"
+            if signals["ma_50"] > signals["ma_100"]
+            else "MA50 below MA100 (downtrend)"
+        )
+    if signals["rsi_14"] is not None:
+        if signals["rsi_14"] >= 70:
+            readings["rsi_14"] = "overbought"
+        elif signals["rsi_14"] <= 30:
+            readings["rsi_14"] = "oversold"
+        else:
+            readings["rsi_14"] = "neutral"
+    if signals["macd_histogram"] is not None:
+        readings["macd_histogram"] = (
+            "bullish momentum" if signals["macd_histogram"] > 0 else "bearish momentum"
+        )
+    if signals["max_move_z"] is not None:
+        readings["max_move_z"] = (
+            "sudden spike or drop" if signals["max_move_z"] >= 3 else "no outliers"
+        )
+    if signals["volume_ratio"] is not None:
+        if signals["volume_ratio"] >= 2:
+            readings["volume_ratio"] = "unusually high volume"
+        elif signals["volume_ratio"] <= 0.5:
+            readings["volume_ratio"] = "unusually low volume"
+        else:
+            readings["volume_ratio"] = "normal volume"
+    return readings
+
+
+def format_signal_table(signals: Dict[str, Optional[float]]) -> str:
+    """Markdown table of computed signals, the only data the LLM needs to see."""
+    readings = describe_signals(signals)
+    rows = ["| Signal | Value | Reading |", "| --- | --- | --- |"]
+    for name, value in signals.items():
+        if value is None:
+            formatted = "n/a"
+        elif isinstance(value, int):
+            formatted = str(value)
+        else:
+            formatted = f"{value:.6g}"
+        rows.append(f"| {name} | {formatted} | {readings.get(name, '')} |")
+    return "\n".join(rows)
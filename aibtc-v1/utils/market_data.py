@@ -0,0 +1,137 @@
+import os
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from urllib3.util.retry import Retry
+from utils.cache import TTLCache
+
+ALEX_API_URL = "https://api.alexgo.io/v1"
+
+
+# one keep-alive session for all ALEX market data calls, so repeated tool
+# calls reuse open connections instead of a new TCP+TLS handshake each time
+class MarketDataClient:
+    def __init__(
+        self,
+        base_url: str = None,
+        pool_size: int = 8,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 15,
+    ):
+        self.base_url = (base_url or os.getenv("ALEX_API_URL") or ALEX_API_URL).rstrip(
+            "/"
+        )
+        self.timeout = timeout
+        self.pool_size = pool_size
+        # allswaps is large and changes rarely, keep an index instead of the payload
+        self.swap_index_ttl = float(os.getenv("ALEX_SWAP_INDEX_TTL", "300"))
+        self.swap_index_cache = TTLCache(max_entries=1)
+        self.swap_index_lock = threading.Lock()
+        # retry connection errors and transient statuses with exponential backoff
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Accept": "application/json"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, path: str, params: dict = None, description: str = None):
+        response = self.session.get(
+            f"{self.base_url}/{path.lstrip('/')}", params=params, timeout=self.timeout
+        )
+        if not response.ok:
+            raise Exception(
+                f"Failed to get {description or path}: {response.status_code} {response.reason}"
+            )
+        return response.json()
+
+    def get_price_history(self, token_address: str, limit: int = 100) -> dict:
+        return self.get_json(
+            f"price_history/{token_address}",
+            {"limit": limit},
+            "token price history",
+        )
+
+    def get_pool_volume(self, pool_token_id: str, limit: int = 100) -> dict:
+        return self.get_json(
+            f"pool_volume/{pool_token_id}", {"limit": limit}, "pool volume"
+        )
+
+    def get_all_swaps(self) -> list:
+        return self.get_json("allswaps", description="all swaps")
+
+    def get_swap_index(self) -> Dict[str, List[dict]]:
+        """Map of token symbol and token address to the pools that quote it."""
+        index = self.swap_index_cache.get("allswaps")
+        if index is not None:
+            return index
+        # one refresh at a time, other callers wait for its result
+        with self.swap_index_lock:
+            index = self.swap_index_cache.get("allswaps")
+            if index is None:
+                index = build_swap_index(self.get_all_swaps())
+                self.swap_index_cache.set("allswaps", index, self.swap_index_ttl)
+            return index
+
+    def find_pools(self, symbol_or_address: str) -> List[dict]:
+        """Pools for a token symbol (e.g. WELSH) or token address."""
+        return self.get_swap_index().get(normalize_token_key(symbol_or_address), [])
+
+    def get_price_and_volume(
+        self, token_address: str, pool_token_id: str, limit: int = 100
+    ) -> Tuple[dict, dict]:
+        """Fetch price history and pool volume at the same time."""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            prices = executor.submit(self.get_price_history, token_address, limit)
+            volumes = executor.submit(self.get_pool_volume, pool_token_id, limit)
+            return prices.result(), volumes.result()
+
+    def close(self):
+        self.session.close()
+
+
+def normalize_token_key(symbol_or_address: str) -> str:
+    key = symbol_or_address.strip()
+    # contract addresses are case sensitive, symbols are not
+    return key if "." in key else key.upper()
+
+
+def build_swap_index(swaps: list) -> Dict[str, List[dict]]:
+    index = {}
+    for swap in swaps:
+        pool = {
+            "pool_id": swap["id"],
+            "quote": swap.get("quote"),
+            "symbol": swap.get("quoteSymbol"),
+            "token_address": swap.get("quoteId"),
+        }
+        for key in (pool["symbol"], pool["token_address"]):
+            if key:
+                index.setdefault(normalize_token_key(key), []).append(pool)
+    return index
+
+
+market_data_client: Optional[MarketDataClient] = None
+market_data_lock = threading.Lock()
+
+
+def get_market_data_client() -> MarketDataClient:
+    """Return the shared market data client, creating it on first use."""
+    global market_data_client
+    with market_data_lock:
+        if market_data_client is None:
+            market_data_client = MarketDataClient(
+                pool_size=int(os.getenv("ALEX_API_POOL_SIZE", "8"))
+            )
+        return market_data_client
@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from utils.market_data import MarketDataClient
+
+# largest window requested from the ALEX api in one call
+MAX_HISTORY_LIMIT = 5000
+
+
+# price and pool volume series keyed by block height in a local sqlite file,
+# so each sync only has to add the blocks newer than what is already stored
+class BlockSeriesStore:
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("ALEX_HISTORY_DB", "./cache/market_data.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS series "
+            "(series TEXT, block_height INTEGER, value REAL, "
+            "PRIMARY KEY (series, block_height)) WITHOUT ROWID"
+        )
+        # block ranges a sync could not reach, the api only returns the latest
+        # MAX_HISTORY_LIMIT points so they can't be filled later
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS gaps "
+            "(series TEXT, after_height INTEGER, before_height INTEGER, "
+            "PRIMARY KEY (series, after_height))"
+        )
+        self.db.commit()
+
+    def latest_height(self, series: str) -> Optional[int]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT MAX(block_height) FROM series WHERE series = ?", (series,)
+            ).fetchone()
+        return row[0]
+
+    def upsert(self, series: str, points: Iterable[Tuple[int, float]]) -> int:
+        """Store (block_height, value) points, returning how many were given."""
+        rows = [(series, int(height), float(value)) for height, value in points]
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO series VALUES (?, ?, ?)", rows)
+            self.db.commit()
+        return len(rows)
+
+    def load(self, series: str, limit: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Block heights and values, oldest first, optionally only the latest limit."""
+        query = "SELECT block_height, value FROM series WHERE series = ? "
+        query += "ORDER BY block_height DESC"
+        params = (series,)
+        if limit:
+            query += " LIMIT ?"
+            params = (series, limit)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        rows.reverse()
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        data = np.array(rows, dtype=np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1]
+
+    def add_gap(self, series: str, after_height: int, before_height: int):
+        """Record that points between the two block heights are missing."""
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO gaps VALUES (?, ?, ?)",
+                (series, int(after_height), int(before_height)),
+            )
+            self.db.commit()
+
+    def list_gaps(self, series: str) -> List[Tuple[int, int]]:
+        """(after_height, before_height) of each recorded gap, oldest first."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT after_height, before_height FROM gaps WHERE series = ? "
+                "ORDER BY after_height",
+                (series,),
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def list_series(self, prefix: str = "") -> list:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT DISTINCT series FROM series WHERE series LIKE ? ORDER BY series",
+                (f"{prefix}%",),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def price_series(token_address: str) -> str:
+    return f"price:{token_address}"
+
+
+def volume_series(pool_token_id) -> str:
+    return f"volume:{pool_token_id}"
+
+
+def sync_series(store: BlockSeriesStore, series: str, fetch, points_of) -> int:
+    """Fetch until the response overlaps the stored series, then store new points.
+
+    The api only takes a limit, so the window starts small and doubles until it
+    reaches the last stored block height or the start of the history. points_of
+    returns every entry of a response, values of None are dropped only when
+    storing so a page with gaps is not mistaken for the start of the history.
+    If even the largest window doesn't reach the stored series, the blocks in
+    between can't be fetched, they are recorded as a gap with a warning.
+    """
+    last_height = store.latest_height(series)
+    limit = 100 if last_height is not None else MAX_HISTORY_LIMIT
+    while True:
+        points = points_of(fetch(limit))
+        if (
+            last_height is None
+            or len(points) < limit
+            or limit >= MAX_HISTORY_LIMIT
+            or min(height for height, _ in points) <= last_height
+        ):
+            break
+        limit = min(limit * 2, MAX_HISTORY_LIMIT)
+    if (
+        last_height is not None
+        and len(points) >= limit
+        and min(height for height, _ in points) > last_height
+    ):
+        first_height = min(height for height, _ in points)
+        store.add_gap(series, last_height, first_height)
+        print(
+            f"Warning: {series} has more than {limit} new points, "
+            f"blocks {last_height} to {first_height} are missing"
+        )
+    new_points = [
+        (height, value)
+        for height, value in points
+        if value is not None and (last_height is None or height > last_height)
+    ]
+    return store.upsert(series, new_points)
+
+
+def sync_price_history(
+    client: MarketDataClient, store: BlockSeriesStore, token_address: str
+) -> int:
+    return sync_series(
+        store,
+        price_series(token_address),
+        lambda limit: client.get_price_history(token_address, limit),
+        lambda data: [
+            (price["block_height"], price.get("avg_price_usd"))
+            for price in data.get("prices", [])
+        ],
+    )
+
+
+def sync_pool_volume(
+    client: MarketDataClient, store: BlockSeriesStore, pool_token_id: str
+) -> int:
+    return sync_series(
+        store,
+        volume_series(pool_token_id),
+        lambda limit: client.get_pool_volume(pool_token_id, limit),
+        lambda data: [
+            (volume["block_height"], volume.get("volume_24h"))
+            for volume in data.get("volume_values", [])
+        ],
+    )
+
+
+def sync_token(
+    client: MarketDataClient,
+    store: BlockSeriesStore,
+    token_address: str,
+    pool_token_id: str,
+) -> Tuple[int, int]:
+    """Sync price and volume history at the same time, returning new point counts."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        prices = executor.submit(sync_price_history, client, store, token_address)
+        volumes = executor.submit(sync_pool_volume, client, store, pool_token_id)
+        return prices.result(), volumes.result()
+
+
+block_series_store: Optional[BlockSeriesStore] = None
+block_series_lock = threading.Lock()
+
+
+def get_block_series_store() -> BlockSeriesStore:
+    """Return the shared series store, creating it on first use."""
+    global block_series_store
+    with block_series_lock:
+        if block_series_store is None:
+            block_series_store = BlockSeriesStore()
+        return block_series_store
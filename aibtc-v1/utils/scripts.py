@@ -1,5 +1,13 @@
+import asyncio
+import atexit
+import json
+import os
+import queue
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from utils.cache import TTLCache
 
 
 def get_timestamp():
@@ -10,14 +18,262 @@ def get_pretty_timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+class BunWorkerUnavailable(Exception):
+    """The request never reached a worker, so running it elsewhere is safe."""
+
+
+# long-lived bun process that runs scripts in-process (see bun_worker.ts)
+class BunWorker:
+    worker_script = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "bun_worker.ts"
+    )
+
+    def __init__(self, working_dir: str):
+        self.process = subprocess.Popen(
+            ["bun", "run", BunWorker.worker_script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            cwd=working_dir,
+        )
+        self.lines = queue.Queue()
+        self.next_id = 0
+        self.runs = 0
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        # signal EOF so a pending request fails fast instead of timing out
+        self.lines.put(None)
+
+    def _read_message(self, timeout: float):
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no response from Bun worker within {timeout}s")
+        if line is None:
+            raise RuntimeError("Bun worker exited unexpectedly")
+        return json.loads(line)
+
+    def wait_ready(self, timeout: float):
+        if not self._read_message(timeout).get("ready"):
+            raise RuntimeError("Bun worker did not report ready")
+
+    def run(self, script: str, args: list, timeout: float) -> dict:
+        """Send one request to the worker and wait for its response."""
+        self.next_id += 1
+        request = {"id": self.next_id, "script": script, "args": args}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise BunWorkerUnavailable(f"Bun worker is not accepting requests: {e}")
+        self.runs += 1
+        response = self._read_message(timeout)
+        if response.get("id") != self.next_id:
+            raise RuntimeError(f"Bun worker response out of order: {response}")
+        return {
+            "output": response.get("output"),
+            "error": response.get("error"),
+            "success": bool(response.get("success")),
+        }
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.is_alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+# fixed-size pool of bun workers, started lazily and shared across threads
+class BunWorkerPool:
+    def __init__(
+        self,
+        working_dir: str,
+        size: int = 2,
+        timeout: float = 120,
+        startup_timeout: float = 30,
+        max_runs: int = 100,
+    ):
+        self.working_dir = working_dir
+        self.size = size
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        # every run loads a fresh copy of the script module, so workers are
+        # replaced after max_runs to keep their memory bounded
+        self.max_runs = max_runs
+        self.idle = queue.Queue()
+        self.slots = threading.Semaphore(size)
+
+    def _acquire(self) -> BunWorker:
+        self.slots.acquire()
+        try:
+            worker = self.idle.get_nowait()
+            if worker.is_alive():
+                return worker
+        except queue.Empty:
+            pass
+        try:
+            worker = BunWorker(self.working_dir)
+            worker.wait_ready(self.startup_timeout)
+            return worker
+        except Exception:
+            self.slots.release()
+            raise
+
+    def run(self, script: str, args: list):
+        """Run a script on a pooled worker.
+
+        Returns None only if the request never reached a worker. Once a worker
+        has started the script it may have already sent a transaction or a
+        payment, so a failure then is returned as an error and not retried.
+        """
+        try:
+            worker = self._acquire()
+        except Exception as e:
+            print(f"Bun worker pool unavailable: {e}")
+            return None
+        try:
+            result = worker.run(script, args, self.timeout)
+        except BunWorkerUnavailable as e:
+            print(f"Bun worker pool unavailable: {e}")
+            worker.process.kill()
+            self.slots.release()
+            return None
+        except Exception as e:
+            # a hung or crashed worker is dropped and replaced on next acquire
+            print(f"Bun worker failed running {script}: {e}")
+            worker.process.kill()
+            self.slots.release()
+            return {
+                "output": "",
+                "error": f"Bun worker failed after starting {script}: {e}",
+                "success": False,
+            }
+        if worker.runs >= self.max_runs:
+            worker.close()
+        else:
+            self.idle.put(worker)
+        self.slots.release()
+        return result
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().close()
+
+
 # generic runner for Bun.js scripts
 class BunScriptRunner:
     working_dir = "./agent-tools-ts/"
     script_dir = "src"
+    # number of long-lived bun workers, 0 spawns a new process per call
+    pool_size = int(os.getenv("AIBTC_BUN_WORKERS", "2"))
+    worker_pool = None
+    pool_lock = threading.Lock()
+    # scripts run on the pool, read-only lookups that finish once their fetch
+    # calls return (see bun_worker.ts), everything else runs in a new process
+    pooled_scripts = {
+        "stacks-contracts/get-contract-source-code.ts",
+        "stacks-bns/get-address-by-bns.ts",
+        "stacks-wallet/get-address-balance-detailed.ts",
+        "stacks-wallet/get-transactions-by-address.ts",
+    }
+    # read-only scripts whose results can be reused, with ttl in seconds
+    # anything not listed here (e.g. pay-invoice.ts, faucet-drip.ts) always runs
+    cache_ttls = {
+        "stacks-contracts/get-contract-source-code.ts": 24 * 60 * 60,
+        "stacks-bns/get-address-by-bns.ts": 60 * 60,
+        "stacks-wallet/get-address-balance-detailed.ts": 60,
+        "stacks-wallet/get-transactions-by-address.ts": 60,
+    }
+    cache = TTLCache(
+        max_entries=int(os.getenv("AIBTC_BUN_CACHE_SIZE", "512")),
+        path=os.getenv("AIBTC_BUN_CACHE_PATH") or None,
+    )
+
+    @staticmethod
+    def get_worker_pool():
+        """Return the shared worker pool, creating it on first use."""
+        with BunScriptRunner.pool_lock:
+            if BunScriptRunner.worker_pool is None:
+                BunScriptRunner.worker_pool = BunWorkerPool(
+                    BunScriptRunner.working_dir,
+                    size=BunScriptRunner.pool_size,
+                    max_runs=int(os.getenv("AIBTC_BUN_WORKER_MAX_RUNS", "100")),
+                )
+                atexit.register(BunScriptRunner.worker_pool.close)
+            return BunScriptRunner.worker_pool
 
     @staticmethod
     def bun_run(contract_name: str, script_name: str, arg: str = None):
         """Runs a TypeScript script using bun with an optional positional argument."""
+        ttl = BunScriptRunner.cache_ttls.get(f"{contract_name}/{script_name}")
+        if ttl is None:
+            return BunScriptRunner.bun_run_uncached(contract_name, script_name, arg)
+
+        key = json.dumps([contract_name, script_name, arg])
+        result = BunScriptRunner.cache.get(key)
+        if result is None:
+            result = BunScriptRunner.bun_run_uncached(contract_name, script_name, arg)
+            # only successful results are reused, errors are retried next call
+            if result["success"]:
+                BunScriptRunner.cache.set(key, result, ttl)
+        return dict(result)
+
+    @staticmethod
+    def bun_run_uncached(contract_name: str, script_name: str, arg: str = None):
+        """Runs a pooled script on a worker, anything else in a new process."""
+        if (
+            BunScriptRunner.pool_size > 0
+            and f"{contract_name}/{script_name}" in BunScriptRunner.pooled_scripts
+        ):
+            script = f"{BunScriptRunner.script_dir}/{contract_name}/{script_name}"
+            args = [arg] if arg is not None else []
+            result = BunScriptRunner.get_worker_pool().run(script, args)
+            if result is not None:
+                return result
+        return BunScriptRunner.bun_spawn(contract_name, script_name, arg)
+
+    @staticmethod
+    async def bun_run_async(contract_name: str, script_name: str, arg: str = None):
+        """Runs a TypeScript script without blocking the event loop."""
+        return await asyncio.to_thread(
+            BunScriptRunner.bun_run, contract_name, script_name, arg
+        )
+
+    @staticmethod
+    async def bun_run_many_async(calls: list, max_concurrency: int = 4):
+        """Runs (contract_name, script_name, arg) calls concurrently, results in order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(call):
+            async with semaphore:
+                return await BunScriptRunner.bun_run_async(*call)
+
+        return await asyncio.gather(*(run_one(call) for call in calls))
+
+    @staticmethod
+    def bun_run_many(calls: list, max_concurrency: int = 4):
+        """Blocking wrapper around bun_run_many_async for synchronous tools."""
+        coroutine = BunScriptRunner.bun_run_many_async(calls, max_concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # already inside an event loop, run the batch on a separate thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    @staticmethod
+    def bun_spawn(contract_name: str, script_name: str, arg: str = None):
+        """Runs a TypeScript script in a fresh bun process."""
         command = [
             "bun",
             "run",
@@ -0,0 +1,100 @@
+import os
+import requests
+import threading
+from requests.adapters import HTTPAdapter
+from typing import Iterator, Optional
+from urllib3.util.retry import Retry
+
+MAINNET_API_URL = "https://api.hiro.so"
+TESTNET_API_URL = "https://api.testnet.hiro.so"
+
+# the largest page the address endpoints return
+MAX_PAGE_SIZE = 50
+
+stacks_api_session: Optional[requests.Session] = None
+stacks_api_lock = threading.Lock()
+
+
+def get_api_url(address: str = None) -> str:
+    """Stacks API base url, from the address prefix or the NETWORK setting."""
+    if os.getenv("STACKS_API_URL"):
+        return os.getenv("STACKS_API_URL").rstrip("/")
+    if address:
+        return MAINNET_API_URL if address[:2] in ("SP", "SM") else TESTNET_API_URL
+    return MAINNET_API_URL if os.getenv("NETWORK") == "mainnet" else TESTNET_API_URL
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session that backs off on rate limits and server errors."""
+    global stacks_api_session
+    with stacks_api_lock:
+        if stacks_api_session is None:
+            retry = Retry(
+                total=5,
+                backoff_factor=1,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+                raise_on_status=False,
+            )
+            session = requests.Session()
+            session.headers.update({"Accept": "application/json"})
+            if os.getenv("HIRO_API_KEY"):
+                session.headers.update({"x-api-key": os.getenv("HIRO_API_KEY")})
+            session.mount("https://", HTTPAdapter(max_retries=retry))
+            session.mount("http://", HTTPAdapter(max_retries=retry))
+            stacks_api_session = session
+        return stacks_api_session
+
+
+def get_page(url: str, offset: int, limit: int = MAX_PAGE_SIZE) -> dict:
+    response = get_session().get(
+        url, params={"limit": limit, "offset": offset}, timeout=30
+    )
+    if not response.ok:
+        raise Exception(
+            f"Failed to get {url}: {response.status_code} {response.reason}"
+        )
+    return response.json()
+
+
+def iter_pages(url: str, offset: int = 0, limit: int = MAX_PAGE_SIZE) -> Iterator[dict]:
+    """Yield each page of a limit/offset endpoint until the total is reached."""
+    while True:
+        page = get_page(url, offset, limit)
+        yield page
+        results = page.get("results", [])
+        offset += len(results)
+        if not results or offset >= page.get("total", 0):
+            return
+
+
+def address_transactions_url(address: str) -> str:
+    # includes stx sent/received and token transfers for each transaction
+    return f"{get_api_url(address)}/extended/v1/address/{address}/transactions_with_transfers"
+
+
+def get_address_balances(address: str) -> dict:
+    """STX, fungible and non-fungible token balances of an address."""
+    url = f"{get_api_url(address)}/extended/v1/address/{address}/balances"
+    response = get_session().get(url, timeout=30)
+    if not response.ok:
+        raise Exception(
+            f"Failed to get {url}: {response.status_code} {response.reason}"
+        )
+    return response.json()
+
+
+def list_deployed_contracts(address: str, page_size: int = MAX_PAGE_SIZE) -> list:
+    """List the identifiers of every contract successfully deployed by an address."""
+    url = f"{get_api_url(address)}/extended/v1/address/{address}/transactions"
+    contracts = []
+    for page in iter_pages(url, limit=page_size):
+        for tx in page.get("results", []):
+            if (
+                tx.get("tx_type") == "smart_contract"
+                and tx.get("tx_status") == "success"
+                and tx.get("sender_address") == address
+            ):
+                contracts.append(tx["smart_contract"]["contract_id"])
+    # oldest deployment first
+    return list(reversed(contracts))
@@ -1,40 +1,147 @@
+import hashlib
 import os
 import requests
+import threading
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from crewai_tools import Tool
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from litellm import embedding
-from chromadb import Client as ChromaClient
-from chromadb.config import Settings
-import chromadb
-import streamlit as st
+from typing import TYPE_CHECKING, Dict, Optional
+from utils.cache import EmbeddingCache, TTLCache, get_embedding_cache
+from utils.vector_index import VectorIndex, get_vector_index, get_vector_index_path
+
+# chroma and langchain are imported where they are used, so the numpy backend
+# and the search tools load without them
+if TYPE_CHECKING:
+    import chromadb
 
 load_dotenv()
 
+# the clarity book sections behind each collection, built ahead of time with
+# run_vector_ingest.py so importing this module never fetches or embeds
+CLARITY_BOOK_CORPORA = {
+    "clarity_book_code": [
+        "https://book.clarity-lang.org/ch04-00-storing-data.html",
+        "https://book.clarity-lang.org/ch05-00-functions.html",
+        "https://book.clarity-lang.org/ch03-00-keywords.html",
+        "https://book.clarity-lang.org/ch02-00-types.html",
+    ],
+    "clarity_book_functions": [
+        "https://book.clarity-lang.org/ch05-00-functions.html",
+        "https://book.clarity-lang.org/ch05-01-public-functions.html",
+        "https://book.clarity-lang.org/ch05-02-private-functions.html",
+        "https://book.clarity-lang.org/ch05-03-read-only-functions.html",
+    ],
+}
+
+# seconds a search result is reused by the tool that produced it
+SEARCH_CACHE_TTL = 60 * 60
+
+chroma_client: Optional["chromadb.ClientAPI"] = None
+chroma_collections: Dict[str, "chromadb.Collection"] = {}
+chroma_lock = threading.Lock()
+
 
 class AIBTCEmbeddings:
     """A class to get embeddings using LiteLLM."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: int = None,
+        max_batch_tokens: int = None,
+        max_concurrency: int = None,
+        cache: EmbeddingCache = None,
+        use_cache: bool = True,
+    ):
         self.model_name = os.getenv("OPENAI_EMBEDDER_MODEL", "text-embedding-3-small")
+        # vectors are reused across processes for the same model and text
+        self.cache = (cache or get_embedding_cache()) if use_cache else None
+        self.api_base = os.getenv("AIBTC_EMBEDDER_API_BASE") or None
+        # texts per request, capped by an estimated token total per request
+        self.batch_size = batch_size or int(os.getenv("AIBTC_EMBED_BATCH_SIZE", "256"))
+        self.max_batch_tokens = max_batch_tokens or int(
+            os.getenv("AIBTC_EMBED_BATCH_TOKENS", "100000")
+        )
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("AIBTC_EMBED_CONCURRENCY", "4")
+        )
+
+    def get_embeddings(self, texts):
+        """Retrieve embeddings for several texts in one LiteLLM request."""
+        kwargs = {"api_base": self.api_base} if self.api_base else {}
+        response = embedding(model=self.model_name, input=list(texts), **kwargs)
+        if (
+            not response
+            or "data" not in response
+            or len(response["data"]) != len(texts)
+        ):
+            raise Exception(f"Failed to get embeddings: {response}")
+        data = sorted(response["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
 
     def get_embedding(self, text):
         """Retrieve embeddings for a given text using LiteLLM."""
-        response = embedding(model=self.model_name, input=[text])
-        if not response or "data" not in response or not response["data"]:
-            raise Exception(f"Failed to get embeddings: {response}")
-        return response["data"][0]["embedding"]
+        return self.get_embeddings([text])[0]
+
+    def make_batches(self, texts):
+        """Split texts into consecutive (start, end) ranges within the batch caps."""
+        batches = []
+        start = 0
+        tokens = 0
+        for index, text in enumerate(texts):
+            text_tokens = estimate_tokens(text)
+            if index > start and (
+                index - start >= self.batch_size
+                or tokens + text_tokens > self.max_batch_tokens
+            ):
+                batches.append((start, index))
+                start = index
+                tokens = 0
+            tokens += text_tokens
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
 
     def embed_documents(self, texts):
-        """Embed a list of texts (documents) using LiteLLM."""
-        return [self.get_embedding(text) for text in texts]
+        """Embed a list of texts (documents), requesting only uncached texts."""
+        texts = list(texts)
+        if self.cache is None:
+            return self.request_embeddings(texts)
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = list(
+            dict.fromkeys(
+                text for text, vector in zip(texts, vectors) if vector is None
+            )
+        )
+        if missing:
+            embedded = self.request_embeddings(missing)
+            self.cache.set_many(self.model_name, missing, embedded)
+            by_text = dict(zip(missing, embedded))
+            vectors = [
+                by_text[text] if vector is None else vector
+                for text, vector in zip(texts, vectors)
+            ]
+        return vectors
+
+    def request_embeddings(self, texts):
+        """Embed texts in batches, several requests at a time."""
+        batches = self.make_batches(texts)
+        workers = max(1, min(self.max_concurrency, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda batch: self.get_embeddings(texts[batch[0] : batch[1]]), batches
+            )
+            return [vector for vectors in results for vector in vectors]
 
     def embed_query(self, query):
         """Embed a single query string using LiteLLM."""
-        return self.get_embedding(query)
+        return self.embed_documents([query])[0]
+
+
+def estimate_tokens(text: str) -> int:
+    # about four characters per token for english text and code
+    return len(text) // 4 + 1
 
 
 def fetch_clarity_book_content(website_url: str):
@@ -59,69 +166,217 @@ def fetch_clarity_book_content(website_url: str):
     return full_content
 
 
-def create_vector_store(urls, chunk_size=1000, chunk_overlap=200):
-    """Create a vector store from a list of URLs using LiteLLM embeddings."""
+def get_vector_store_path() -> str:
+    return os.getenv("AIBTC_VECTOR_STORE_PATH", "./chroma")
+
+
+def get_chroma_client() -> "chromadb.ClientAPI":
+    """Return the shared persistent Chroma client, opening it on first use."""
+    import chromadb
+
+    global chroma_client
+    with chroma_lock:
+        if chroma_client is None:
+            chroma_client = chromadb.PersistentClient(path=get_vector_store_path())
+        return chroma_client
+
+
+def get_vector_store(collection_name: str) -> "chromadb.Collection":
+    """Open a collection built by run_vector_ingest.py, once per process."""
+    client = get_chroma_client()
+    with chroma_lock:
+        if collection_name not in chroma_collections:
+            try:
+                collection = client.get_collection(name=collection_name)
+            except Exception as e:
+                raise Exception(
+                    f"Vector store {collection_name} not found in {get_vector_store_path()}, "
+                    "build it with python aibtc-v1/run_vector_ingest.py"
+                ) from e
+            chroma_collections[collection_name] = collection
+        return chroma_collections[collection_name]
+
+
+def split_documents(urls, chunk_size=1000, chunk_overlap=200):
+    """Fetch the pages and split them into chunks with their source url."""
+    from langchain.schema import Document
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     documents = []
     for url in urls:
         content = fetch_clarity_book_content(url)
+        # an empty page would look like every chunk of it was removed
+        if not content:
+            raise Exception(f"No article content found at {url}")
         documents.append(Document(page_content=content, metadata={"source": url}))
 
     # Split the documents into smaller chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
-    splits = text_splitter.split_documents(documents)
+    return text_splitter.split_documents(documents)
 
-    # Initialize AIBTCEmbeddings
-    aibtc_embeddings = AIBTCEmbeddings()
 
-    # Create embeddings for each document chunk
-    embeddings = aibtc_embeddings.embed_documents([doc.page_content for doc in splits])
+def chunk_id(doc) -> str:
+    """Stable id from the chunk source and text, unchanged chunks keep their id."""
+    key = f"{doc.metadata['source']}\n{doc.page_content}"
+    return hashlib.sha256(key.encode()).hexdigest()
 
-    # Create a new Chroma client
-    chroma_client = chromadb.PersistentClient(path="./chroma")
 
-    # Create or get a collection in Chroma for storing embeddings
-    collection = chroma_client.get_or_create_collection(name="example_collection")
+def sync_collection(collection, splits, embedder=None) -> dict:
+    """Make a collection hold exactly the given chunks.
+
+    Only chunks whose id is not stored yet are embedded and upserted, and
+    stored chunks that are no longer produced are deleted, so a refresh
+    costs as much as the pages that changed.
+    """
+    chunks = {chunk_id(doc): doc for doc in splits}
+    stored = set(collection.get(include=[])["ids"])
+    new_ids = [key for key in chunks if key not in stored]
+    stale_ids = sorted(stored - set(chunks))
+
+    if new_ids:
+        embedder = embedder or AIBTCEmbeddings()
+        documents = [chunks[key].page_content for key in new_ids]
+        collection.upsert(
+            ids=new_ids,
+            documents=documents,
+            metadatas=[chunks[key].metadata for key in new_ids],
+            embeddings=embedder.embed_documents(documents),
+        )
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+    return {
+        "added": len(new_ids),
+        "removed": len(stale_ids),
+        "unchanged": len(chunks) - len(new_ids),
+    }
 
-    # Add the document chunks, metadata, and their embeddings to the Chroma collection
-    collection.add(
-        documents=[doc.page_content for doc in splits],
-        metadatas=[doc.metadata for doc in splits],
-        ids=[str(i) for i in range(len(splits))],
-        embeddings=embeddings,
-    )
 
+def create_vector_store(
+    urls, chunk_size=1000, chunk_overlap=200, collection_name="example_collection"
+):
+    """Create or refresh a vector store from a list of URLs using LiteLLM embeddings."""
+    splits = split_documents(urls, chunk_size, chunk_overlap)
+    collection = get_chroma_client().get_or_create_collection(name=collection_name)
+    sync_collection(collection, splits)
     return collection
 
 
-def create_vector_search_tool(vector_store, name, description):
-    """Create a vector search tool using the given vector store."""
+def build_vector_index(name, splits, nlist=0, embedder=None) -> VectorIndex:
+    """Write the chunks to a numpy vector index, the lightweight chroma alternative.
 
-    def search_func(query: str):
-        results = vector_store.similarity_search(query, k=3)
-        return "\n\n".join(
-            f"From {doc.metadata['source']}:\n{doc.page_content}" for doc in results
-        )
+    The index is rewritten as a whole, unchanged chunks come from the
+    embedding cache so only new text is sent to the embedding api.
+    """
+    chunks = {chunk_id(doc): doc for doc in splits}
+    embedder = embedder or AIBTCEmbeddings()
+    documents = [doc.page_content for doc in chunks.values()]
+    return VectorIndex.build(
+        os.path.join(get_vector_index_path(), name),
+        ids=list(chunks),
+        documents=documents,
+        metadatas=[doc.metadata for doc in chunks.values()],
+        embeddings=embedder.embed_documents(documents),
+        nlist=nlist,
+        model=embedder.model_name,
+    )
 
-    return Tool(name=name, func=search_func, description=description)
 
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries share a cache entry."""
+    return " ".join(query.lower().split())
 
-# Define the URLs for different sections of the Clarity book
-clarity_book_code_vector_store = create_vector_store(
-    [
-        "https://book.clarity-lang.org/ch04-00-storing-data.html",
-        "https://book.clarity-lang.org/ch05-00-functions.html",
-        "https://book.clarity-lang.org/ch03-00-keywords.html",
-        "https://book.clarity-lang.org/ch02-00-types.html",
-    ]
-)
 
-clarity_book_function_vector_store = create_vector_store(
-    [
-        "https://book.clarity-lang.org/ch05-00-functions.html",
-        "https://book.clarity-lang.org/ch05-01-public-functions.html",
-        "https://book.clarity-lang.org/ch05-02-private-functions.html",
-        "https://book.clarity-lang.org/ch05-03-read-only-functions.html",
+def chroma_where(where: dict) -> Optional[dict]:
+    """Chroma takes one field per filter, several fields are combined with $and."""
+    if not where:
+        return None
+    if len(where) == 1:
+        return where
+    return {"$and": [{key: value} for key, value in where.items()]}
+
+
+def search_collection(collection, embedding, k=3, where=None) -> list:
+    """Top k chunks of a chroma collection for a query embedding."""
+    results = collection.query(
+        query_embeddings=[embedding],
+        n_results=k,
+        where=chroma_where(where),
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        {
+            "id": chunk_id,
+            "document": document,
+            "metadata": metadata,
+            "distance": distance,
+        }
+        for chunk_id, document, metadata, distance in zip(
+            results["ids"][0],
+            results["documents"][0],
+            results["metadatas"][0],
+            results["distances"][0],
+        )
     ]
-)
+
+
+def search_vector_store(vector_store, embedding, k=3, where=None, backend=None):
+    """Search a chroma collection, a collection name, or a numpy index name.
+
+    where filters on chunk metadata, e.g. {"source": url} for one book
+    chapter or {"source": {"$in": urls}} for several.
+    """
+    backend = backend or os.getenv("AIBTC_VECTOR_BACKEND", "chroma")
+    if backend == "numpy":
+        nprobe = os.getenv("AIBTC_VECTOR_NPROBE")
+        return get_vector_index(vector_store).search(
+            embedding, k=k, where=where, nprobe=int(nprobe) if nprobe else None
+        )
+    collection = (
+        get_vector_store(vector_store)
+        if isinstance(vector_store, str)
+        else vector_store
+    )
+    return search_collection(collection, embedding, k, where)
+
+
+def format_search_results(results) -> str:
+    return "\n\n".join(
+        f"From {result['metadata']['source']}:\n{result['document']}"
+        for result in results
+    )
+
+
+def create_vector_search_tool(
+    vector_store, name, description, backend=None, k=None, where=None
+):
+    """Create a vector search tool using the given vector store or collection name.
+
+    A collection name is only opened on the first search. With the numpy
+    backend (AIBTC_VECTOR_BACKEND=numpy) the name refers to an index built
+    with build_vector_index instead of a chroma collection. k defaults to
+    AIBTC_VECTOR_SEARCH_K and where limits the search to matching chunks.
+    """
+    backend = backend or os.getenv("AIBTC_VECTOR_BACKEND", "chroma")
+    k = k or int(os.getenv("AIBTC_VECTOR_SEARCH_K", "3"))
+    embedder = AIBTCEmbeddings()
+    # agents of a crew often repeat a lookup, answer those without
+    # embedding or searching again
+    results_cache = TTLCache(
+        max_entries=int(os.getenv("AIBTC_VECTOR_SEARCH_CACHE_SIZE", "128"))
+    )
+
+    def search_func(query: str):
+        # the normalized query only keys the cache, the embedding is of the
+        # query as written so code identifiers keep their case
+        key = normalize_query(query)
+        results = results_cache.get(key)
+        if results is None:
+            results = search_vector_store(
+                vector_store, embedder.embed_query(query), k, where, backend
+            )
+            results_cache.set(key, results, SEARCH_CACHE_TTL)
+        return format_search_results(results)
+
+    return Tool(name=name, func=search_func, description=description)
@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, List
+
+
+# a small vector store in plain files: float32 rows in a memory-mapped matrix
+# searched with exact dot products, optionally split into IVF lists so a
+# query only scans the lists closest to it
+class VectorIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "chunks.json")) as f:
+            chunks = json.load(f)
+        self.ids = chunks["ids"]
+        self.documents = chunks["documents"]
+        self.metadatas = chunks["metadatas"]
+        shape = (self.meta["count"], self.meta["dimensions"])
+        self.vectors = (
+            np.memmap(
+                os.path.join(path, "vectors.f32"),
+                dtype=np.float32,
+                mode="r",
+                shape=shape,
+            )
+            if self.meta["count"]
+            else np.empty(shape, dtype=np.float32)
+        )
+        self.centroids = None
+        self.offsets = None
+        if self.meta.get("nlist"):
+            self.centroids = np.fromfile(
+                os.path.join(path, "centroids.f32"), dtype=np.float32
+            ).reshape(self.meta["nlist"], self.meta["dimensions"])
+            self.offsets = np.asarray(self.meta["offsets"])
+
+    @staticmethod
+    def build(
+        path: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        embeddings: List[list],
+        nlist: int = 0,
+        model: str = None,
+    ) -> "VectorIndex":
+        """Write an index to path, replacing any previous one in a single rename.
+
+        With nlist above 0 the rows are clustered with k-means and stored
+        list by list, so each list is one contiguous slice of the matrix.
+        """
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        nlist = min(nlist, len(ids))
+        meta = {
+            "count": len(ids),
+            "dimensions": int(vectors.shape[1]) if len(ids) else 0,
+            "nlist": nlist,
+            "model": model,
+        }
+        centroids = None
+        if nlist:
+            centroids, assignments = train_ivf(vectors, nlist)
+            order = np.argsort(assignments, kind="stable")
+            vectors = vectors[order]
+            ids = [ids[row] for row in order]
+            documents = [documents[row] for row in order]
+            metadatas = [metadatas[row] for row in order]
+            meta["offsets"] = np.searchsorted(
+                assignments[order], np.arange(nlist + 1)
+            ).tolist()
+
+        # unique names per build keep concurrent builds of one index apart
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        temp_path = tempfile.mkdtemp(
+            dir=parent, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            vectors.tofile(os.path.join(temp_path, "vectors.f32"))
+            if centroids is not None:
+                centroids.tofile(os.path.join(temp_path, "centroids.f32"))
+            with open(os.path.join(temp_path, "chunks.json"), "w") as f:
+                json.dump(
+                    {"ids": ids, "documents": documents, "metadatas": metadatas}, f
+                )
+            with open(os.path.join(temp_path, "meta.json"), "w") as f:
+                json.dump(meta, f)
+        except BaseException:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+        # swap directories so readers see either the old or the new index
+        old_path = f"{temp_path}.old"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(temp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return VectorIndex(path)
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int = None) -> np.ndarray:
+        """Rows in the nprobe lists closest to the query, or all rows."""
+        if self.centroids is None or nprobe is None or nprobe >= len(self.centroids):
+            return None
+        lists = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        return np.concatenate(
+            [np.arange(self.offsets[index], self.offsets[index + 1]) for index in lists]
+        )
+
+    def search(
+        self, embedding, k: int = 3, where: dict = None, nprobe: int = None
+    ) -> List[dict]:
+        """Top k chunks by cosine similarity, optionally filtered by metadata."""
+        if not self.meta["count"]:
+            return []
+        query = normalize(np.asarray(embedding, dtype=np.float32))
+        rows = self.candidate_rows(query, nprobe)
+        if where:
+            allowed = np.flatnonzero(
+                [matches_filter(metadata, where) for metadata in self.metadatas]
+            )
+            rows = allowed if rows is None else np.intersect1d(rows, allowed)
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if not len(vectors):
+            return []
+        scores = vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "id": self.ids[row],
+                "document": self.documents[row],
+                "metadata": self.metadatas[row],
+                "score": float(scores[position]),
+            }
+            for position, row in zip(top, top if rows is None else rows[top])
+        ]
+
+    def count(self) -> int:
+        return self.meta["count"]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale to unit length along the last axis so dot products are cosines."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0):
+    """Spherical k-means, returning unit centroids and each row's list."""
+    generator = np.random.default_rng(seed)
+    centroids = vectors[generator.choice(len(vectors), nlist, replace=False)]
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        # lists that lost every row keep their previous centroid
+        filled = np.bincount(assignments, minlength=nlist) > 0
+        centroids[filled] = normalize(sums[filled])
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def matches_filter(metadata: dict, where: dict) -> bool:
+    """Metadata equality filter, a value may also be {"$in": [...]}."""
+    for key, expected in where.items():
+        value = metadata.get(key)
+        if isinstance(expected, dict) and "$in" in expected:
+            if value not in expected["$in"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def get_vector_index_path() -> str:
+    return os.getenv("AIBTC_VECTOR_INDEX_PATH", "./cache/vector_index")
+
+
+vector_indexes: Dict[str, VectorIndex] = {}
+vector_index_lock = threading.Lock()
+
+
+def get_vector_index(name: str) -> VectorIndex:
+    """Open a named index built by run_vector_ingest.py, once per process."""
+    with vector_index_lock:
+        if name not in vector_indexes:
+            path = os.path.join(get_vector_index_path(), name)
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                raise Exception(
+                    f"Vector index {name} not found in {get_vector_index_path()}, "
+                    "build it with python aibtc-v1/run_vector_ingest.py --backend numpy"
+                )
+            vector_indexes[name] = VectorIndex(path)
+        return vector_indexes[name]
@@ -0,0 +1,413 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+from utils.wallet_store import WalletStore
+
+MICRO_STX = 1_000_000
+
+# strftime formats for the activity periods, coarser periods keep long
+# histories within the row limit
+PERIODS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+    "year": "%Y",
+}
+
+
+def format_time(block_time) -> str:
+    if block_time is None:
+        return "n/a"
+    return datetime.fromtimestamp(block_time, tz=timezone.utc).isoformat()
+
+
+def format_stx(micro_stx) -> str:
+    return f"{(micro_stx or 0) / MICRO_STX:,.6f}".rstrip("0").rstrip(".")
+
+
+def activity_overview(store: WalletStore, address: str) -> dict:
+    rows = store.query(
+        "SELECT COUNT(*), SUM(tx_status = 'success'), MIN(block_time), "
+        "MAX(block_time), MIN(block_height), MAX(block_height), "
+        "SUM(CASE WHEN sender = ? THEN fee ELSE 0 END), "
+        "SUM(stx_received), SUM(stx_sent) "
+        "FROM transactions WHERE address = ?",
+        (address, address),
+    )
+    (
+        count,
+        succeeded,
+        first_time,
+        last_time,
+        first_block,
+        last_block,
+        fees,
+        stx_in,
+        stx_out,
+    ) = rows[0]
+    return {
+        "transactions": count,
+        "failed": count - (succeeded or 0),
+        "first_activity": first_time,
+        "last_activity": last_time,
+        "first_block": first_block,
+        "last_block": last_block,
+        "fees_paid": fees or 0,
+        "stx_in": stx_in or 0,
+        "stx_out": stx_out or 0,
+    }
+
+
+def cached_activity(
+    store: WalletStore, address: str, kind: str, group: str, params: tuple
+) -> list:
+    """Transactions and STX in/out per group, oldest first.
+
+    New transactions only ever land in the newest group, so once the history
+    is complete every older group is final. Those are kept in the activity
+    cache with their highest block and only blocks after it are aggregated
+    again, which keeps a re-summary proportional to the new transactions.
+    """
+    complete = (store.get_state(address) or {}).get("complete", False)
+    cached = store.load_activity(address, kind) if complete else []
+    after = cached[-1][-1] if cached else -1
+    fresh = store.query(
+        f"SELECT {group} AS period, COUNT(*), SUM(stx_received), SUM(stx_sent), "
+        "MAX(block_height) FROM transactions WHERE address = ? AND block_height > ? "
+        "GROUP BY period ORDER BY period",
+        (*params, address, after),
+    )
+    if complete and len(fresh) > 1:
+        store.save_activity(address, kind, fresh[:-1])
+    return [row[:4] for row in cached + fresh]
+
+
+def period_activity(store: WalletStore, address: str, period: str = "day") -> list:
+    """Transactions and STX in/out per calendar period, oldest first."""
+    return cached_activity(
+        store,
+        address,
+        f"period:{period}",
+        "strftime(?, block_time, 'unixepoch')",
+        (PERIODS[period],),
+    )
+
+
+def block_activity(store: WalletStore, address: str, bucket_size: int = 1000) -> list:
+    """Transactions and STX in/out per bucket of block heights, oldest first."""
+    return cached_activity(
+        store,
+        address,
+        f"blocks:{bucket_size}",
+        "(block_height / ?) * ?",
+        (bucket_size, bucket_size),
+    )
+
+
+def contract_calls(store: WalletStore, address: str, limit: int = 10) -> list:
+    """Most called contract functions with call and failure counts."""
+    return store.query(
+        "SELECT contract_id, function_name, COUNT(*), SUM(tx_status != 'success') "
+        "FROM transactions WHERE address = ? AND tx_type = 'contract_call' "
+        "GROUP BY contract_id, function_name ORDER BY COUNT(*) DESC, contract_id "
+        "LIMIT ?",
+        (address, limit),
+    )
+
+
+def counterparties(store: WalletStore, address: str, limit: int = 10) -> list:
+    """Addresses ranked by STX volume exchanged with the wallet."""
+    return store.query(
+        "SELECT CASE WHEN sender = ? THEN recipient ELSE sender END AS counterparty, "
+        "COUNT(*), SUM(CASE WHEN recipient = ? THEN CAST(amount AS INTEGER) ELSE 0 END), "
+        "SUM(CASE WHEN sender = ? THEN CAST(amount AS INTEGER) ELSE 0 END) "
+        "FROM asset_transfers WHERE address = ? AND kind = 'stx' "
+        "AND (sender = ? OR recipient = ?) "
+        "GROUP BY counterparty ORDER BY SUM(CAST(amount AS INTEGER)) DESC, counterparty "
+        "LIMIT ?",
+        (address, address, address, address, address, address, limit),
+    )
+
+
+def asset_changes(store: WalletStore, address: str, limit: int = 10) -> list:
+    """Net fungible and non-fungible token flow per asset, largest activity first."""
+    changes: Dict[tuple, list] = defaultdict(lambda: [0, 0, 0])
+    # token amounts can exceed 64 bits, so they are summed in python
+    for kind, asset, amount, sender, recipient in store.iter_query(
+        "SELECT kind, asset, amount, sender, recipient FROM asset_transfers "
+        "WHERE address = ? AND kind != 'stx'",
+        (address,),
+    ):
+        quantity = int(amount) if kind == "ft" and amount else 1
+        entry = changes[(kind, asset)]
+        entry[0] += 1
+        if recipient == address:
+            entry[1] += quantity
+        if sender == address:
+            entry[2] += quantity
+    ranked = sorted(changes.items(), key=lambda item: (-item[1][0], item[0]))
+    return [(kind, asset, *values) for (kind, asset), values in ranked[:limit]]
+
+
+def choose_period(store: WalletStore, address: str, max_rows: int) -> str:
+    for period in PERIODS:
+        if len(period_activity(store, address, period)) <= max_rows:
+            return period
+    return "year"
+
+
+def markdown_table(headers: List[str], rows: List[list]) -> str:
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join("---" for _ in headers) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(value) for value in row) + " |")
+    return "\n".join(lines)
+
+
+def format_wallet_analytics(
+    store: WalletStore, address: str, max_rows: int = 24, block_bucket: int = 10_000
+) -> str:
+    """Compact markdown summary of a wallet's stored history for the LLM."""
+    overview = activity_overview(store, address)
+    if not overview["transactions"]:
+        return f"No stored transactions for {address}"
+
+    period = choose_period(store, address, max_rows)
+    periods = period_activity(store, address, period)
+    blocks = block_activity(store, address, block_bucket)
+    sections = [
+        f"### Activity for {address}",
+        markdown_table(
+            [
+                "Transactions",
+                "Failed",
+                "First Activity",
+                "Last Activity",
+                "Blocks",
+                "STX In",
+                "STX Out",
+                "Fees Paid (STX)",
+            ],
+            [
+                [
+                    overview["transactions"],
+                    overview["failed"],
+                    format_time(overview["first_activity"]),
+                    format_time(overview["last_activity"]),
+                    f"{overview['first_block']} - {overview['last_block']}",
+                    format_stx(overview["stx_in"]),
+                    format_stx(overview["stx_out"]),
+                    format_stx(overview["fees_paid"]),
+                ]
+            ],
+        ),
+        f"### Activity per {period}",
+        markdown_table(
+            [period.capitalize(), "Transactions", "STX In", "STX Out"],
+            [
+                [name, count, format_stx(stx_in), format_stx(stx_out)]
+                for name, count, stx_in, stx_out in periods[-max_rows:]
+            ],
+        ),
+        f"### Activity per {block_bucket} blocks",
+        markdown_table(
+            ["From Block", "Transactions", "STX In", "STX Out"],
+            [
+                [bucket, count, format_stx(stx_in), format_stx(stx_out)]
+                for bucket, count, stx_in, stx_out in blocks[-max_rows:]
+            ],
+        ),
+    ]
+
+    calls = contract_calls(store, address)
+    if calls:
+        sections += [
+            "### Top Contract Calls",
+            markdown_table(["Contract", "Function", "Calls", "Failed"], calls),
+        ]
+    parties = counterparties(store, address)
+    if parties:
+        sections += [
+            "### Top Counterparties by STX Volume",
+            markdown_table(
+                ["Address", "Transfers", "STX Received", "STX Sent"],
+                [
+                    [party, count, format_stx(received), format_stx(sent)]
+                    for party, count, received, sent in parties
+                ],
+            ),
+        ]
+    assets = asset_changes(store, address)
+    if assets:
+        sections += [
+            "### Token Flows",
+            markdown_table(
+                ["Kind", "Asset", "Transfers", "Received", "Sent"],
+                assets,
+            ),
+        ]
+    return "\n\n".join(sections)
+
+
+def portfolio_contract_calls(
+    store: WalletStore, addresses: List[str], limit: int = 10
+) -> list:
+    """Contract functions most called by any of the wallets."""
+    marks = ", ".join("?" for _ in addresses)
+    # a call between two of the wallets is stored under both, count it once
+    return store.query(
+        "SELECT contract_id, function_name, COUNT(DISTINCT tx_id), "
+        "COUNT(DISTINCT sender) FROM transactions "
+        f"WHERE address IN ({marks}) AND sender IN ({marks}) "
+        "AND tx_type = 'contract_call' GROUP BY contract_id, function_name "
+        "ORDER BY COUNT(DISTINCT tx_id) DESC, contract_id LIMIT ?",
+        (*addresses, *addresses, limit),
+    )
+
+
+def portfolio_transfers(store: WalletStore, addresses: List[str], limit: int = 10):
+    """STX moved between the wallets, and outside counterparties by volume."""
+    marks = ", ".join("?" for _ in addresses)
+    transfers = (
+        "SELECT DISTINCT tx_id, sender, recipient, CAST(amount AS INTEGER) AS amount "
+        f"FROM asset_transfers WHERE address IN ({marks}) AND kind = 'stx'"
+    )
+    internal = store.query(
+        f"SELECT COUNT(*), SUM(amount) FROM ({transfers}) "
+        f"WHERE sender IN ({marks}) AND recipient IN ({marks})",
+        (*addresses, *addresses, *addresses),
+    )[0]
+    external = store.query(
+        f"SELECT CASE WHEN sender IN ({marks}) THEN recipient ELSE sender END "
+        "AS counterparty, COUNT(*), "
+        f"SUM(CASE WHEN sender IN ({marks}) THEN 0 ELSE amount END), "
+        f"SUM(CASE WHEN sender IN ({marks}) THEN amount ELSE 0 END) "
+        f"FROM ({transfers}) WHERE (sender IN ({marks})) != (recipient IN ({marks})) "
+        "GROUP BY counterparty ORDER BY SUM(amount) DESC, counterparty LIMIT ?",
+        (*addresses, *addresses, *addresses, *addresses, *addresses, *addresses, limit),
+    )
+    return internal, external
+
+
+def merge_activity(activities: List[list]) -> list:
+    """Sum per-wallet (period, transactions, stx_in, stx_out) rows by period."""
+    totals: Dict[object, list] = defaultdict(lambda: [0, 0, 0])
+    for rows in activities:
+        for period, count, stx_in, stx_out in rows:
+            total = totals[period]
+            total[0] += count
+            total[1] += stx_in or 0
+            total[2] += stx_out or 0
+    return [(period, *totals[period]) for period in sorted(totals)]
+
+
+def format_portfolio_analytics(
+    store: WalletStore, wallets: Dict[str, dict], max_rows: int = 24
+) -> str:
+    """Per-wallet and combined tables for a set of synced wallets.
+
+    wallets maps each address to its sync_wallets result, wallets that
+    failed to sync are listed but left out of the combined figures.
+    """
+    addresses = [
+        address for address, wallet in wallets.items() if "error" not in wallet
+    ]
+    rows = []
+    for address in addresses:
+        overview = activity_overview(store, address)
+        balance = wallets[address]["balance"]
+        stx = balance.get("stx", {})
+        rows.append(
+            [
+                address,
+                format_stx(int(stx.get("balance") or 0)),
+                format_stx(int(stx.get("locked") or 0)),
+                len(balance.get("fungible_tokens") or {}),
+                sum(
+                    int(token.get("count") or 0)
+                    for token in (balance.get("non_fungible_tokens") or {}).values()
+                ),
+                overview["transactions"],
+                format_time(overview["first_activity"]),
+                format_time(overview["last_activity"]),
+                format_stx(overview["stx_in"]),
+                format_stx(overview["stx_out"]),
+                format_stx(overview["fees_paid"]),
+            ]
+        )
+    sections = [
+        "### Wallets",
+        markdown_table(
+            [
+                "Address",
+                "STX Balance",
+                "STX Locked",
+                "Tokens",
+                "NFTs",
+                "Transactions",
+                "First Activity",
+                "Last Activity",
+                "STX In",
+                "STX Out",
+                "Fees Paid (STX)",
+            ],
+            rows,
+        ),
+    ]
+    failed = {
+        address: wallet for address, wallet in wallets.items() if "error" in wallet
+    }
+    if failed:
+        sections += [
+            "### Wallets Not Synced",
+            markdown_table(
+                ["Address", "Error"],
+                [[address, wallet["error"]] for address, wallet in failed.items()],
+            ),
+        ]
+    if not addresses:
+        return "\n\n".join(sections)
+
+    # the coarsest period any wallet needs, so every wallet shares the grid
+    period = max(
+        (choose_period(store, address, max_rows) for address in addresses),
+        key=list(PERIODS).index,
+    )
+    combined = merge_activity(
+        [period_activity(store, address, period) for address in addresses]
+    )
+    sections += [
+        f"### Combined Activity per {period} (summed over wallets)",
+        markdown_table(
+            [period.capitalize(), "Transactions", "STX In", "STX Out"],
+            [
+                [name, count, format_stx(stx_in), format_stx(stx_out)]
+                for name, count, stx_in, stx_out in combined[-max_rows:]
+            ],
+        ),
+    ]
+    calls = portfolio_contract_calls(store, addresses)
+    if calls:
+        sections += [
+            "### Top Contract Calls",
+            markdown_table(["Contract", "Function", "Calls", "Wallets"], calls),
+        ]
+    (internal_count, internal_amount), external = portfolio_transfers(store, addresses)
+    sections.append(
+        f"Transfers between the wallets: {internal_count}, "
+        f"{format_stx(internal_amount)} STX"
+    )
+    if external:
+        sections += [
+            "### Top Outside Counterparties by STX Volume",
+            markdown_table(
+                ["Address", "Transfers", "STX Received", "STX Sent"],
+                [
+                    [party, count, format_stx(received), format_stx(sent)]
+                    for party, count, received, sent in external
+                ],
+            ),
+        ]
+    return "\n\n".join(sections)
@@ -0,0 +1,508 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from utils.stacks_api import (
+    MAX_PAGE_SIZE,
+    address_transactions_url,
+    get_address_balances,
+    get_page,
+)
+
+
+# every transaction of a wallet in a local sqlite file, ingested a page at a
+# time with a resumable cursor so large wallets never have to fit in memory
+class WalletStore:
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("AIBTC_WALLET_DB", "./cache/wallets.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                address TEXT, tx_id TEXT, block_height INTEGER, block_time INTEGER,
+                tx_type TEXT, tx_status TEXT, sender TEXT, contract_id TEXT,
+                function_name TEXT, fee INTEGER, stx_sent INTEGER, stx_received INTEGER,
+                PRIMARY KEY (address, tx_id)
+            );
+            CREATE INDEX IF NOT EXISTS transactions_by_height
+                ON transactions (address, block_height);
+            CREATE TABLE IF NOT EXISTS asset_transfers (
+                address TEXT, tx_id TEXT, kind TEXT, asset TEXT, amount TEXT,
+                sender TEXT, recipient TEXT
+            );
+            CREATE INDEX IF NOT EXISTS asset_transfers_by_tx
+                ON asset_transfers (address, tx_id);
+            CREATE TABLE IF NOT EXISTS ingest_state (
+                address TEXT PRIMARY KEY, backfill_offset INTEGER, total INTEGER,
+                complete INTEGER, updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS wallet_index (
+                address TEXT PRIMARY KEY, last_block INTEGER, balance TEXT,
+                balance_block INTEGER, balance_updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS activity_cache (
+                address TEXT, kind TEXT, period, transactions INTEGER,
+                stx_in INTEGER, stx_out INTEGER, last_block INTEGER,
+                PRIMARY KEY (address, kind, period)
+            );
+            """
+        )
+        self.db.commit()
+
+    def get_state(self, address: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT backfill_offset, total, complete, updated_at "
+                "FROM ingest_state WHERE address = ?",
+                (address,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "backfill_offset": row[0],
+            "total": row[1],
+            "complete": bool(row[2]),
+            "updated_at": row[3],
+        }
+
+    def save_page(self, address: str, results: list, state: dict = None) -> int:
+        """Store one page of transactions and the cursor in a single commit.
+
+        Returns how many of the transactions were not stored yet.
+        """
+        transactions = [transaction_row(address, item) for item in results]
+        with self.lock:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO transactions VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                transactions,
+            )
+            added = self.db.total_changes - before
+            for item in results:
+                tx_id = item["tx"]["tx_id"]
+                # replace the transfers so a re-fetched page doesn't duplicate them
+                self.db.execute(
+                    "DELETE FROM asset_transfers WHERE address = ? AND tx_id = ?",
+                    (address, tx_id),
+                )
+                self.db.executemany(
+                    "INSERT INTO asset_transfers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    transfer_rows(address, tx_id, item),
+                )
+            if state is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO ingest_state VALUES (?, ?, ?, ?, ?)",
+                    (
+                        address,
+                        state["backfill_offset"],
+                        state["total"],
+                        int(state["complete"]),
+                        time.time(),
+                    ),
+                )
+            self.db.commit()
+        return added
+
+    def get_index(self, address: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT last_block, balance, balance_block, balance_updated_at "
+                "FROM wallet_index WHERE address = ?",
+                (address,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "last_block": row[0],
+            "balance": json.loads(row[1]) if row[1] else None,
+            "balance_block": row[2],
+            "balance_updated_at": row[3],
+        }
+
+    def update_last_block(self, address: str) -> Optional[int]:
+        """Record the highest stored block of an address in its index."""
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO wallet_index (address, last_block) VALUES (?, "
+                "(SELECT MAX(block_height) FROM transactions WHERE address = ?)) "
+                "ON CONFLICT (address) DO UPDATE SET last_block = excluded.last_block",
+                (address, address),
+            )
+            self.db.commit()
+        return self.get_index(address)["last_block"]
+
+    def save_balance(self, address: str, balance: dict, block_height: int):
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO wallet_index VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (address) DO UPDATE SET balance = excluded.balance, "
+                "balance_block = excluded.balance_block, "
+                "balance_updated_at = excluded.balance_updated_at",
+                (address, block_height, json.dumps(balance), block_height, time.time()),
+            )
+            self.db.commit()
+
+    def load_activity(self, address: str, kind: str) -> list:
+        """Cached (period, transactions, stx_in, stx_out, last_block) rows, oldest first."""
+        with self.lock:
+            return self.db.execute(
+                "SELECT period, transactions, stx_in, stx_out, last_block "
+                "FROM activity_cache WHERE address = ? AND kind = ? ORDER BY period",
+                (address, kind),
+            ).fetchall()
+
+    def save_activity(self, address: str, kind: str, rows: list):
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO activity_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(address, kind, *row) for row in rows],
+            )
+            self.db.commit()
+
+    def has_transaction(self, address: str, tx_id: str) -> bool:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM transactions WHERE address = ? AND tx_id = ?",
+                (address, tx_id),
+            ).fetchone()
+        return row is not None
+
+    def count_transactions(self, address: str) -> int:
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM transactions WHERE address = ?", (address,)
+            ).fetchone()[0]
+
+    def summary(self, address: str) -> dict:
+        with self.lock:
+            count, first_time, last_time, first_block, last_block = self.db.execute(
+                "SELECT COUNT(*), MIN(block_time), MAX(block_time), "
+                "MIN(block_height), MAX(block_height) "
+                "FROM transactions WHERE address = ?",
+                (address,),
+            ).fetchone()
+            types = self.db.execute(
+                "SELECT tx_type, COUNT(*) FROM transactions WHERE address = ? "
+                "GROUP BY tx_type ORDER BY COUNT(*) DESC",
+                (address,),
+            ).fetchall()
+        return {
+            "transactions": count,
+            "first_block_time": first_time,
+            "last_block_time": last_time,
+            "first_block": first_block,
+            "last_block": last_block,
+            "types": dict(types),
+        }
+
+    def iter_transactions(self, address: str, batch_size: int = 1000):
+        """Yield stored transactions as dicts, oldest first, in bounded batches."""
+        last_key = (-1, "")
+        while True:
+            with self.lock:
+                cursor = self.db.execute(
+                    "SELECT * FROM transactions WHERE address = ? "
+                    "AND (block_height, tx_id) > (?, ?) "
+                    "ORDER BY block_height, tx_id LIMIT ?",
+                    (address, *last_key, batch_size),
+                )
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(columns, row))
+            last_key = (rows[-1][2], rows[-1][1])
+
+    def recent_transactions(self, address: str, limit: int = 20) -> list:
+        """The newest stored transactions with their transfers, newest first."""
+        with self.lock:
+            cursor = self.db.execute(
+                "SELECT * FROM transactions WHERE address = ? "
+                "ORDER BY block_height DESC, tx_id DESC LIMIT ?",
+                (address, limit),
+            )
+            columns = [column[0] for column in cursor.description]
+            transactions = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            for transaction in transactions:
+                transfers = self.db.execute(
+                    "SELECT kind, asset, amount, sender, recipient FROM asset_transfers "
+                    "WHERE address = ? AND tx_id = ?",
+                    (address, transaction["tx_id"]),
+                ).fetchall()
+                transaction["transfers"] = [
+                    dict(zip(("kind", "asset", "amount", "sender", "recipient"), row))
+                    for row in transfers
+                ]
+        return transactions
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def iter_query(self, sql: str, params: tuple = (), batch_size: int = 1000):
+        """Yield the rows of a query in bounded batches."""
+        with self.lock:
+            cursor = self.db.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def transaction_row(address: str, item: dict) -> tuple:
+    tx = item["tx"]
+    contract_call = tx.get("contract_call") or {}
+    contract_id = contract_call.get("contract_id") or (
+        tx.get("smart_contract") or {}
+    ).get("contract_id")
+    return (
+        address,
+        tx["tx_id"],
+        tx.get("block_height"),
+        tx.get("burn_block_time"),
+        tx.get("tx_type"),
+        tx.get("tx_status"),
+        tx.get("sender_address"),
+        contract_id,
+        contract_call.get("function_name"),
+        int(tx.get("fee_rate") or 0),
+        int(item.get("stx_sent") or 0),
+        int(item.get("stx_received") or 0),
+    )
+
+
+def transfer_rows(address: str, tx_id: str, item: dict) -> list:
+    rows = []
+    for transfer in item.get("stx_transfers", []):
+        rows.append(
+            (
+                address,
+                tx_id,
+                "stx",
+                "STX",
+                str(transfer.get("amount")),
+                transfer.get("sender"),
+                transfer.get("recipient"),
+            )
+        )
+    for transfer in item.get("ft_transfers", []):
+        rows.append(
+            (
+                address,
+                tx_id,
+                "ft",
+                transfer.get("asset_identifier"),
+                str(transfer.get("amount")),
+                transfer.get("sender"),
+                transfer.get("recipient"),
+            )
+        )
+    for transfer in item.get("nft_transfers", []):
+        value = (transfer.get("value") or {}).get("repr")
+        rows.append(
+            (
+                address,
+                tx_id,
+                "nft",
+                transfer.get("asset_identifier"),
+                value,
+                transfer.get("sender"),
+                transfer.get("recipient"),
+            )
+        )
+    return rows
+
+
+def ingest_address_transactions(
+    address: str,
+    store: WalletStore,
+    page_size: int = MAX_PAGE_SIZE,
+    max_pages: int = None,
+    on_page: Callable[[dict], None] = None,
+) -> dict:
+    """Fetch new transactions and continue the history backfill for an address.
+
+    The api lists transactions newest first by offset. New transactions are
+    read from offset 0 down to the highest block recorded in the wallet
+    index, which also shifts the backfill cursor, then older pages are read
+    from the cursor until the history is complete or max_pages is used up.
+    max_pages only limits the backfill, stopping early on new transactions
+    would leave a gap above the cursor. The index is only moved up once the
+    new transactions are stored, and every page is committed with the
+    cursor, so an interrupted run resumes where it stopped.
+    """
+    url = address_transactions_url(address)
+    state = store.get_state(address) or {
+        "backfill_offset": 0,
+        "total": 0,
+        "complete": False,
+    }
+    # stores from before the index stop at the first stored transaction
+    last_block = (store.get_index(address) or {}).get("last_block")
+    pages = 0
+    added = 0
+
+    def report(stage: str, page_added: int):
+        if on_page:
+            on_page(
+                {
+                    "stage": stage,
+                    "added": page_added,
+                    "backfill_offset": state["backfill_offset"],
+                    "total": state["total"],
+                }
+            )
+
+    # newest transactions first, until one that is already stored
+    if state["total"]:
+        offset = 0
+        while True:
+            page = get_page(url, offset, page_size)
+            pages += 1
+            results = page.get("results", [])
+            if offset == 0:
+                # everything above the backfill cursor moved down by this much
+                state["backfill_offset"] += max(
+                    page.get("total", 0) - state["total"], 0
+                )
+                state["total"] = page.get("total", 0)
+            page_added = store.save_page(address, results, state)
+            added += page_added
+            report("new", page_added)
+            offset += len(results)
+            if last_block is not None:
+                reached = any(
+                    (item["tx"].get("block_height") or 0) <= last_block
+                    for item in results
+                )
+            else:
+                reached = page_added < len(results)
+            if reached or not results or offset >= state["total"]:
+                break
+
+    # then older transactions from the saved cursor
+    new_pages = pages
+    while not state["complete"] and (
+        max_pages is None or pages - new_pages < max_pages
+    ):
+        page = get_page(url, state["backfill_offset"], page_size)
+        pages += 1
+        results = page.get("results", [])
+        state["total"] = page.get("total", 0)
+        state["backfill_offset"] += len(results)
+        state["complete"] = not results or state["backfill_offset"] >= state["total"]
+        page_added = store.save_page(address, results, state)
+        added += page_added
+        report("backfill", page_added)
+
+    return {
+        "address": address,
+        "added": added,
+        "pages": pages,
+        "stored": store.count_transactions(address),
+        "total": state["total"],
+        "complete": state["complete"],
+        "last_block": store.update_last_block(address),
+    }
+
+
+def balance_snapshot_is_current(index: dict, max_age: float = None) -> bool:
+    """Whether a stored balance snapshot can be reused.
+
+    It has to be taken at the highest stored block and be younger than
+    max_age, which bounds changes without a transaction such as stacking
+    unlocks.
+    """
+    if max_age is None:
+        max_age = float(os.getenv("AIBTC_WALLET_BALANCE_TTL", "3600"))
+    return (
+        index.get("balance") is not None
+        and index["balance_block"] == index["last_block"]
+        and time.time() - index["balance_updated_at"] < max_age
+    )
+
+
+def get_balance_snapshot(
+    address: str, store: WalletStore, max_age: float = None
+) -> dict:
+    """Balances of an address, refetched only when it has new transactions.
+
+    Call after syncing the transactions, the stored snapshot is reused while
+    balance_snapshot_is_current holds.
+    """
+    index = store.get_index(address) or {}
+    if balance_snapshot_is_current(index, max_age):
+        return index["balance"]
+    balance = get_address_balances(address)
+    store.save_balance(address, balance, index.get("last_block"))
+    return balance
+
+
+def sync_address(address: str, store: WalletStore, max_pages: int = None) -> dict:
+    """Sync the transactions of an address and return them with its balance.
+
+    When the stored snapshot is already stale the balance is fetched while
+    the transactions are ingested, instead of after them. It is saved at the
+    block indexed before the ingest, so if the ingest found new transactions
+    the next call fetches it again rather than trusting a snapshot that may
+    have been taken before them.
+    """
+    index = store.get_index(address) or {}
+    if balance_snapshot_is_current(index):
+        result = ingest_address_transactions(address, store, max_pages=max_pages)
+        return {"sync": result, "balance": get_balance_snapshot(address, store)}
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        balance = executor.submit(get_address_balances, address)
+        result = ingest_address_transactions(address, store, max_pages=max_pages)
+        store.save_balance(address, balance.result(), index.get("last_block"))
+    return {"sync": result, "balance": balance.result()}
+
+
+def sync_wallets(
+    addresses: List[str],
+    store: WalletStore,
+    max_pages: int = None,
+    max_workers: int = 8,
+) -> Dict[str, dict]:
+    """Sync the transactions and balance of several addresses concurrently.
+
+    Each address maps to its ingest result and balance, or to the error that
+    stopped it, so one failing wallet doesn't lose the others.
+    """
+
+    def sync(address: str) -> dict:
+        try:
+            return sync_address(address, store, max_pages=max_pages)
+        except Exception as e:
+            return {"error": str(e)}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(addresses)))
+    ) as executor:
+        return dict(zip(addresses, executor.map(sync, addresses)))
+
+
+wallet_store: Optional[WalletStore] = None
+wallet_store_lock = threading.Lock()
+
+
+def get_wallet_store() -> WalletStore:
+    """Return the shared wallet store, creating it on first use."""
+    global wallet_store
+    with wallet_store_lock:
+        if wallet_store is None:
+            wallet_store = WalletStore()
+        return wallet_store